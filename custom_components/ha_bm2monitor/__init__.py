@@ -3,78 +3,109 @@
 from __future__ import annotations
 
 import logging
-
-from .bmx_ble import BMxBluetoothDeviceData, SensorUpdate
-
-from homeassistant.components.bluetooth import (
-    BluetoothScanningMode,
-    BluetoothServiceInfoBleak,
-    async_ble_device_from_address,
+from datetime import datetime, timedelta
+from functools import partial
+
+from .const import (
+    DOMAIN,
+    SERVICE_REQUEST_POLL,
+    CONF_CONNECTION_MODE,
+    DEFAULT_CONNECTION_MODE,
+    CONF_CAPTURE_FRAMES,
+    DEFAULT_CAPTURE_FRAMES,
+    CAPTURE_FLUSH_INTERVAL,
+    STATISTICS_PUBLISH_INTERVAL,
 )
-from homeassistant.components.bluetooth.active_update_processor import (
-    ActiveBluetoothProcessorCoordinator
-)
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import CoreState, HomeAssistant
+from .capture import FrameRecorder
+from .coordinator import BMxActiveBluetoothProcessorCoordinator
+from .hub import BMxHub
+
+from homeassistant.components.bluetooth import BluetoothScanningMode
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import ATTR_DEVICE_ID, Platform
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv, device_registry as dr
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.typing import ConfigType
+import voluptuous as vol
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
 _LOGGER = logging.getLogger(__name__)
 
 
-type BMxConfigEntry = ConfigEntry[ActiveBluetoothProcessorCoordinator]
+type BMxConfigEntry = ConfigEntry[BMxActiveBluetoothProcessorCoordinator]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# Options that can only be changed by reloading the config entry, with their defaults
+_RELOAD_OPTIONS = {
+    CONF_CONNECTION_MODE: DEFAULT_CONNECTION_MODE,
+    CONF_CAPTURE_FRAMES: DEFAULT_CAPTURE_FRAMES,
+}
+
+SERVICE_REQUEST_POLL_SCHEMA = vol.Schema({vol.Required(ATTR_DEVICE_ID): cv.string})
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the BM2 battery monitor integration."""
+
+    async def _async_request_poll(call: ServiceCall) -> None:
+        """Ask for a full poll of a monitor on its next advertisement."""
+        device_id = call.data[ATTR_DEVICE_ID]
+        if (device := dr.async_get(hass).async_get(device_id)) is None:
+            raise ServiceValidationError(f"Unknown device {device_id}")
+
+        for entry_id in device.config_entries:
+            entry = hass.config_entries.async_get_entry(entry_id)
+            if entry is not None and entry.domain == DOMAIN and entry.state is ConfigEntryState.LOADED:
+                _LOGGER.debug("Full poll requested for %s", entry.title)
+                entry.runtime_data.device_data.request_poll()
+                return
+
+        raise ServiceValidationError(f"Device {device_id} is not a loaded BM2 battery monitor")
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_REQUEST_POLL, _async_request_poll, schema=SERVICE_REQUEST_POLL_SCHEMA
+    )
+
+    # Everything shared between monitors lives in the hub, set up once before any of them
+    hub = hass.data[DOMAIN] = BMxHub(hass)
+    await hub.async_load()
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: BMxConfigEntry) -> bool:
     """Set up BMx BLE device from a config entry."""
     address = entry.unique_id
     assert address is not None
-    device_data = BMxBluetoothDeviceData()
-    device_data._entrydata = entry.data
-
-    def _needs_poll(
-        service_info: BluetoothServiceInfoBleak, last_poll: float | None
-    ) -> bool:
-        # Only poll if hass is running, we need to poll,
-        # and we actually have a way to connect to the device
-        return (
-            hass.state is CoreState.running
-            and device_data.poll_needed(service_info, last_poll)
-            and bool(
-                async_ble_device_from_address(
-                    hass, service_info.device.address, connectable=True
-                )
-            )
-        )
 
-    async def _async_poll(service_info: BluetoothServiceInfoBleak) -> SensorUpdate:
-        # BluetoothServiceInfoBleak is defined in HA, otherwise would just pass it
-        # directly to the BMx code
-        # Make sure the device we have is one that we can connect with
-        # in case its coming from a passive scanner
-        if service_info.connectable:
-            connectable_device = service_info.device
-        elif device := async_ble_device_from_address(
-            hass, service_info.device.address, True
-        ):
-            connectable_device = device
-        else:
-            # We have no bluetooth controller that is in range of
-            # the device to poll it
-            raise RuntimeError(
-                f"No connectable device found for {service_info.device.address}"
-            )
-        return await device_data.async_poll(connectable_device)
+    # The hub looks after the device, and does the polling for it
+    hub: BMxHub = hass.data[DOMAIN]
+    await hub.async_import_requirements(entry.data)
+    device_data = hub.add_device(address, entry.data)
+    entry.async_on_unload(partial(hub.remove_device, address))
+
+    # Hand each completed hour's statistics to the recorder every so often, and once more when we're unloaded - the
+    # hour so far is saved by the hub when the device is removed, and carried on with when it's next added
+    publish_statistics = partial(hub.publish_statistics, address, entry.title)
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, publish_statistics, timedelta(seconds=STATISTICS_PUBLISH_INTERVAL)
+        )
+    )
+    entry.async_on_unload(publish_statistics)
 
-    coordinator = entry.runtime_data = ActiveBluetoothProcessorCoordinator(
+    coordinator = entry.runtime_data = BMxActiveBluetoothProcessorCoordinator(
         hass,
         _LOGGER,
+        device_data=device_data,
         address=address,
         mode=BluetoothScanningMode.PASSIVE,
         update_method=device_data.update,
-        needs_poll_method=_needs_poll,
-        poll_method=_async_poll,
+        needs_poll_method=partial(hub.needs_poll, address),
+        poll_method=partial(hub.async_poll, address),
         # We will take advertisements from non-connectable devices
         # since we will trade the BLEDevice for a connectable one
         # if we need to poll it
@@ -84,8 +115,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: BMxConfigEntry) -> bool:
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     # only start after all platforms have had a chance to subscribe
     entry.async_on_unload(coordinator.async_start())
+
+    # If we're staying connected, hold the connection open in the background for the life of the entry
+    if entry.data.get(CONF_CONNECTION_MODE, DEFAULT_CONNECTION_MODE) == "Stay connected":
+        entry.async_create_background_task(
+            hass,
+            device_data.async_stream(
+                partial(hub.best_ble_device, address),
+                coordinator.async_push_update,
+                partial(hub.connection_slot, address),
+                coordinator.async_stream_lost
+            ),
+            f"{entry.title} stream"
+        )
     
-    # Reload if the options change
+    # If frame capture is turned on, write out whatever's been captured every so often, and when we're unloaded
+    if entry.data.get(CONF_CAPTURE_FRAMES, DEFAULT_CAPTURE_FRAMES):
+        recorder = FrameRecorder(
+            hass.config.path(DOMAIN, "captures", f"{address.replace(':', '').lower()}.bm2cap")
+        )
+        device_data.set_frame_recorder(recorder)
+
+        async def _async_write_capture(now: datetime | None = None) -> None:
+            await hass.async_add_executor_job(recorder.write, recorder.take())
+
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass, _async_write_capture, timedelta(seconds=CAPTURE_FLUSH_INTERVAL)
+            )
+        )
+        entry.async_on_unload(_async_write_capture)
+
+    # Apply option changes as they're made, only reloading if we have to
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
     
     return True
@@ -96,9 +157,29 @@ async def async_unload_entry(hass: HomeAssistant, entry: BMxConfigEntry) -> bool
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: BMxConfigEntry) -> None:
+    """Forget anything saved for a device that's been deleted."""
+    hass.data[DOMAIN].forget_device(entry.unique_id)
+
+
 async def _async_update_listener(hass: HomeAssistant, entry: BMxConfigEntry):
     """Handle config options update."""
 
-    # Reload the integration when the options change.
-    _LOGGER.debug("Options have changed, reloading integration")
-    await hass.config_entries.async_reload(entry.entry_id)
+    coordinator = entry.runtime_data
+    device_data = coordinator.device_data
+
+    # The connection mode and frame capture are wired up at setup, so changing them needs a reload
+    if any(
+        entry.data.get(option, default) != device_data.entry_data.get(option, default)
+        for option, default in _RELOAD_OPTIONS.items()
+    ):
+        _LOGGER.debug("Options have changed, reloading integration")
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    # Everything else is read as it's needed, so just swap the options over and show the last reading under them
+    _LOGGER.debug("Options have changed, applying them to the running integration")
+    await hass.data[DOMAIN].async_import_requirements(entry.data)
+    device_data.set_entry_data(entry.data)
+    if (update := device_data.reapply_last_reading()) is not None:
+        coordinator.async_push_update(update)
@@ -0,0 +1,189 @@
+"""Battery chemistry profiles for the BM2 battery monitor integration."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from sensor_state_data.enum import StrEnum
+
+from .const import (
+    CONF_BATTERY_TYPE,
+    DEFAULT_BATTERY_TYPE,
+    CONF_CUSTOM_BATTERY_CHEMISTRY,
+    DEFAULT_CUSTOM_BATTERY_CHEMISTRY,
+    CONF_CUSTOM_CRITICAL_VOLTAGE,
+    DEFAULT_CUSTOM_CRITICAL_VOLTAGE,
+    CONF_CUSTOM_LOW_VOLTAGE,
+    DEFAULT_CUSTOM_LOW_VOLTAGE,
+    CONF_CUSTOM_FLOATING_VOLTAGE,
+    DEFAULT_CUSTOM_FLOATING_VOLTAGE,
+    CONF_CUSTOM_CHARGING_VOLTAGE,
+    DEFAULT_CUSTOM_CHARGING_VOLTAGE,
+    CONF_CUSTOM_NUMPY_VOLTS,
+    DEFAULT_CUSTOM_NUMPY_VOLTS,
+    CONF_CUSTOM_NUMPY_PERCENT,
+    DEFAULT_CUSTOM_NUMPY_PERCENT
+)
+
+# The BM2 reports voltage in centivolts.  Every threshold and interpolation point we use
+# (including the clamped custom values) falls inside this range, so readings outside it
+# can safely be clamped to the ends of the tables without changing the result
+TABLE_MIN_CENTIVOLTS = 900
+TABLE_MAX_CENTIVOLTS = 1700
+
+
+class Battery(StrEnum):
+    agm = "agm"
+    deepcycle = "deepcycle"
+    leadacid = "leadacid"
+    lifepo4 = "lifepo4"
+    lithiumion = "lithiumion"
+    itech120x = "itech120x"
+    custom = "custom"
+
+@dataclass
+class BatteryDetail:
+    battery_chemistry: str
+    volts_to_percent: list
+    critical_voltage: int
+    low_voltage: int
+    floating_voltage: float
+    charging_voltage: float
+
+BATTERIES = {
+    Battery.agm:        BatteryDetail("AGM", [10.5, 11.51, 11.66, 11.81, 11.95, 12.05, 12.15, 12.3, 12.5, 12.75, 12.8, 12.85], 11.66, 11.81, 13.6, 14.3),
+    Battery.deepcycle:  BatteryDetail("Deep-cycle", [10.5, 11.51, 11.66, 11.81, 11.95, 12.05, 12.15, 12.3, 12.5, 12.75, 12.8], 11.66, 12.05, 13.6, 14.4),
+    Battery.leadacid:   BatteryDetail("Lead-acid", [10.5, 11.31, 11.58, 11.75, 11.9, 12.06, 12.2, 12.32, 12.42, 12.5, 12.7], 12.06, 12.2, 13.7, 14.5),
+    Battery.lifepo4:    BatteryDetail("LiFePO4", [10.0, 12.0, 12.5, 12.8, 12.9, 13.0, 13.1, 13.2, 13.3, 13.4, 13.6], 10.5, 12.0, 13.5, 14.4),
+    Battery.lithiumion: BatteryDetail("Lithium-ion", [10.0, 12.0, 12.8, 12.9, 13.0, 13.05, 13.1, 13.2, 13.3, 13.4, 13.6], 10.5, 12.0, 13.5, 14.25),
+    Battery.itech120x:  BatteryDetail("iTechworld 120X (LiFePO4)", [9.5, 10.5, 12.5, 12.7, 12.8, 12.89, 12.91, 12.99, 13.01, 13.1, 13.5], 10.5, 12.5, 13.5, 14.35),
+    Battery.custom:     BatteryDetail("Custom", [10.5, 11.58, 12.06, 13.6], 12.06, 12.2, 13.7, 14.5)
+}
+
+# Keyed on the BATTERY_TYPES option values
+CHEMISTRY_OPTION_TO_BATTERY = {
+    "AGM": Battery.agm,
+    "Deep-cycle": Battery.deepcycle,
+    "Lead-acid": Battery.leadacid,
+    "LiFePO4": Battery.lifepo4,
+    "Lithium-ion": Battery.lithiumion,
+    "iTechworld 120X (LiFePO4)": Battery.itech120x,
+    "Custom": Battery.custom
+}
+
+
+@dataclass(frozen=True, slots=True)
+class BatteryProfile:
+    """Immutable battery profile, resolved once per config entry rather than on every poll"""
+
+    battery_chemistry: str
+    volts_to_percent: tuple[float, ...]
+    percent_steps: tuple[float, ...]
+    critical_voltage: float
+    low_voltage: float
+    floating_voltage: float
+    charging_voltage: float
+
+    # Percentage and status for every centivolt reading between TABLE_MIN_CENTIVOLTS and TABLE_MAX_CENTIVOLTS
+    percent_table: bytes = field(init=False, repr=False, compare=False)
+    status_table: bytes = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """ Precompute the lookup tables, so a reading is a single index rather than an interpolation
+            Obviously I'd prefer to use 4 for floating and 8 for charging, but the
+            BM2 doesn't distinguish between the two """
+
+        # Numpy is only needed here, and only when a battery chemistry has been chosen, so it isn't imported
+        # until then - it's by far the slowest part of loading the integration
+        import numpy as np
+
+        voltages = np.arange(TABLE_MIN_CENTIVOLTS, TABLE_MAX_CENTIVOLTS + 1) / 100.0
+        percentages = np.interp(voltages, self.volts_to_percent, self.percent_steps)
+        statuses = np.select(
+            [
+                voltages >= self.charging_voltage,    # Charging
+                voltages >= self.floating_voltage,    # Floating
+                voltages <= self.critical_voltage,    # Critical
+                voltages <= self.low_voltage          # Low
+            ],
+            [4, 8, 0, 1],
+            default = 2                               # Normal
+        )
+
+        object.__setattr__(self, "percent_table", percentages.astype(np.uint8).tobytes())
+        object.__setattr__(self, "status_table", statuses.astype(np.uint8).tobytes())
+
+    def percentage(self, centivolts: int) -> int:
+        """Look up the remaining percentage for a voltage in centivolts"""
+        return self.percent_table[_table_index(centivolts)]
+
+    def status(self, centivolts: int) -> int:
+        """Look up the status for a voltage in centivolts"""
+        return self.status_table[_table_index(centivolts)]
+
+
+def _table_index(centivolts: int) -> int:
+    """Clamp a centivolt reading into the lookup tables"""
+    if centivolts < TABLE_MIN_CENTIVOLTS:
+        return 0
+    if centivolts > TABLE_MAX_CENTIVOLTS:
+        return TABLE_MAX_CENTIVOLTS - TABLE_MIN_CENTIVOLTS
+    return centivolts - TABLE_MIN_CENTIVOLTS
+
+
+def batch_state_of_charge(profiles: Sequence[BatteryProfile], profile_index, centivolts) -> tuple[Any, Any]:
+    """ Look up the percentage and status for many readings in one go, eg. every monitor at a site or a
+        capture's worth of history - the same lookup tables as BatteryProfile.percentage and .status, so
+        the results are identical
+        profile_index picks the profile in profiles for each reading in centivolts (a single index applies
+        one profile to them all).  Returns numpy arrays of percentages and statuses, shaped like the readings """
+
+    import numpy as np
+
+    table_length = TABLE_MAX_CENTIVOLTS - TABLE_MIN_CENTIVOLTS + 1
+    percent_tables = np.frombuffer(b"".join(profile.percent_table for profile in profiles), dtype = np.uint8)
+    status_tables = np.frombuffer(b"".join(profile.status_table for profile in profiles), dtype = np.uint8)
+
+    # Every table is the same length, so they can be treated as one long table and indexed in a single pass
+    indices = np.asarray(profile_index, dtype = np.intp) * table_length + (
+        np.clip(np.asarray(centivolts, dtype = np.intp), TABLE_MIN_CENTIVOLTS, TABLE_MAX_CENTIVOLTS) - TABLE_MIN_CENTIVOLTS
+    )
+    return percent_tables[indices], status_tables[indices]
+
+
+def build_battery_profile(entrydata: Mapping[str, Any]) -> BatteryProfile | None:
+    """ Resolve the battery profile for a config entry
+        Returns None when the BM2's own percentage and status are to be used as-is """
+
+    battery_option = entrydata.get(CONF_BATTERY_TYPE, DEFAULT_BATTERY_TYPE)
+
+    if battery_option == "Automatic (via BM2)":
+        return None
+
+    if battery_option == "Custom":
+        return BatteryProfile(
+            battery_chemistry = entrydata.get(CONF_CUSTOM_BATTERY_CHEMISTRY, DEFAULT_CUSTOM_BATTERY_CHEMISTRY),
+            volts_to_percent = tuple(entrydata.get(CONF_CUSTOM_NUMPY_VOLTS, DEFAULT_CUSTOM_NUMPY_VOLTS)),
+            percent_steps = tuple(entrydata.get(CONF_CUSTOM_NUMPY_PERCENT, DEFAULT_CUSTOM_NUMPY_PERCENT)),
+            critical_voltage = entrydata.get(CONF_CUSTOM_CRITICAL_VOLTAGE, DEFAULT_CUSTOM_CRITICAL_VOLTAGE),
+            low_voltage = entrydata.get(CONF_CUSTOM_LOW_VOLTAGE, DEFAULT_CUSTOM_LOW_VOLTAGE),
+            floating_voltage = entrydata.get(CONF_CUSTOM_FLOATING_VOLTAGE, DEFAULT_CUSTOM_FLOATING_VOLTAGE),
+            charging_voltage = entrydata.get(CONF_CUSTOM_CHARGING_VOLTAGE, DEFAULT_CUSTOM_CHARGING_VOLTAGE)
+        )
+
+    battery_detail = BATTERIES[CHEMISTRY_OPTION_TO_BATTERY[battery_option]]
+    volts = tuple(battery_detail.volts_to_percent)
+
+    # Percentages are spread evenly across the voltage points, so 11 points gives 0, 10, 20 ... 100
+    steps = len(volts) - 1
+    return BatteryProfile(
+        battery_chemistry = battery_detail.battery_chemistry,
+        volts_to_percent = volts,
+        percent_steps = tuple(100 * i / steps for i in range(len(volts))),
+        critical_voltage = battery_detail.critical_voltage,
+        low_voltage = battery_detail.low_voltage,
+        floating_voltage = battery_detail.floating_voltage,
+        charging_voltage = battery_detail.charging_voltage
+    )
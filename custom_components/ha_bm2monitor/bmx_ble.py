@@ -23,36 +23,75 @@ from sensor_state_data import (
 from .const import (
     CONF_SCAN_MODE,
     DEFAULT_SCAN_MODE,
+    CONF_ADAPTIVE_MIN_INTERVAL,
+    DEFAULT_ADAPTIVE_MIN_INTERVAL,
+    CONF_ADAPTIVE_MAX_INTERVAL,
+    DEFAULT_ADAPTIVE_MAX_INTERVAL,
+    ADAPTIVE_NOISE_CENTIVOLTS,
+    ADAPTIVE_ACTIVE_RATE,
+    HISTORY_SAMPLE_SPACING,
+    HISTORY_CAPACITY,
+    TREND_SHORT_WINDOW,
+    TREND_LONG_WINDOW,
+    TREND_DEADBAND,
+    TIME_TO_CRITICAL_DEADBAND,
+    CONF_VOLTAGE_DEADBAND,
+    DEFAULT_VOLTAGE_DEADBAND,
+    CONF_PUBLISH_MAX_AGE,
+    DEFAULT_PUBLISH_MAX_AGE,
+    CONF_RECORD_EVERY_READING,
+    DEFAULT_RECORD_EVERY_READING,
+    STATISTICS_HOURS_KEPT,
+    CONF_HIGH_RATE_WINDOW,
+    DEFAULT_HIGH_RATE_WINDOW,
+    METRICS_WINDOW,
+    BREAKER_THRESHOLD,
+    BREAKER_BASE_DELAY,
+    BREAKER_MAX_DELAY,
+    BREAKER_REOPEN_RSSI,
+    CONF_CONNECTION_MODE,
+    DEFAULT_CONNECTION_MODE,
+    CONF_ADVERTISEMENT_POLL_INTERVAL,
+    DEFAULT_ADVERTISEMENT_POLL_INTERVAL,
+    STREAM_RECONNECT_MIN_DELAY,
+    STREAM_RECONNECT_MAX_DELAY,
+    STREAM_STALE_TIMEOUT,
     DEFAULT_SCAN_INTERVAL,
-    CONF_BATTERY_TYPE,
-    DEFAULT_BATTERY_TYPE,
     BATTERY_STATUS_LIST,
     BATTERY_STATUS_ICON,
-    GATT_TIMEOUT,
-    CONF_CUSTOM_BATTERY_CHEMISTRY,
-    DEFAULT_CUSTOM_BATTERY_CHEMISTRY,
-    CONF_CUSTOM_CRITICAL_VOLTAGE,
-    DEFAULT_CUSTOM_CRITICAL_VOLTAGE,
-    CONF_CUSTOM_LOW_VOLTAGE,
-    DEFAULT_CUSTOM_LOW_VOLTAGE,
-    CONF_CUSTOM_FIFTY_PERCENT_VOLTAGE,
-    DEFAULT_CUSTOM_FIFTY_PERCENT_VOLTAGE,
-    CONF_CUSTOM_HUNDRED_PERCENT_VOLTAGE,
-    DEFAULT_CUSTOM_HUNDRED_PERCENT_VOLTAGE,
-    CONF_CUSTOM_FLOATING_VOLTAGE,
-    DEFAULT_CUSTOM_FLOATING_VOLTAGE,
-    CONF_CUSTOM_CHARGING_VOLTAGE,
-    DEFAULT_CUSTOM_CHARGING_VOLTAGE,
-    CONF_CUSTOM_NUMPY_VOLTS,
-    DEFAULT_CUSTOM_NUMPY_VOLTS,
-    CONF_CUSTOM_NUMPY_PERCENT,
-    DEFAULT_CUSTOM_NUMPY_PERCENT
+    GATT_TIMEOUT
 )
+from .battery import BatteryProfile, build_battery_profile
+from .breaker import CircuitBreaker
+from .capture import FrameRecorder
+from .scheduler import SlotUnavailableError
+from .history import VoltageHistory
+from .hourly import HourlyStatistics, HourSummary
+from .metrics import (
+    PollMetrics,
+    PHASE_CONNECT,
+    PHASE_SUBSCRIBE,
+    PHASE_GATT_WAIT,
+    PHASE_DECODE,
+    PHASE_TOTAL
+)
+from .models import (
+    BMx_MANUFACTURER,
+    DEVICE_TYPES,
+    LOCAL_NAME_TO_MODEL,
+    MANUFACTURER_TO_MODEL,
+    Models
+)
+from .protocol import BMxFrame
+from .window import FrameWindow
 
 import logging
+import math
 import time
-from dataclasses import dataclass
-from enum import Enum, auto
+from collections.abc import Callable, Mapping
+from typing import Any
+from contextlib import AbstractAsyncContextManager, nullcontext
+from functools import partial
 #from enum import StrEnum
 
 from bleak import BleakError, BLEDevice
@@ -69,16 +108,11 @@ from sensor_state_data.enum import StrEnum
 from homeassistant.const import (
     PERCENTAGE,
     UnitOfElectricPotential,
+    UnitOfTemperature,
     CONF_SCAN_INTERVAL
 )
 
-# For the decryption of the returned characteristic payload
 import asyncio
-import binascii
-from Crypto.Cipher import AES
-
-# For percentage interpolation
-import numpy as np
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -86,79 +120,23 @@ class BMxSensor(StrEnum):
     BATTERY_PERCENT = "battery_percent"
     BATTERY_STATUS = "battery_status"
     BATTERY_VOLTAGE = "battery_voltage"
+    TEMPERATURE = "temperature"
     SIGNAL_STRENGTH = "signal_strength"
-
-@dataclass
-class ModelDescription:
-    device_type: str
-    identifier: str | byte | None
-    characteristic: str
-
-BMx_MANUFACTURER = 0x004C
-
-class Models(Enum):
-    BM2 = auto()
-    BM6 = auto() # Placeholder - not yet supported
-
-# Placeholder for future support of BM6...
-#BYTES_TO_MODEL = {
-#    b'\x03"': Models.BM2,
-#    b'\x04"': Models.BM6,
-#}
-
-DEVICE_TYPES = {
-    Models.BM2: ModelDescription(
-        device_type="BM2 battery monitor",
-        identifier = BMx_MANUFACTURER,  #TBD if this is going to work
-        characteristic = "{0000fff4-0000-1000-8000-00805f9b34fb}"
-    ),
-    Models.BM6: ModelDescription(
-        device_type="BM6 battery monitor",
-        identifier = "TBD",
-        characteristic = "{TBD}"
-    )
-}
-
-
-class Battery(StrEnum):
-    agm = "agm"
-    deepcycle = "deepcycle"
-    leadacid = "leadacid"
-    lifepo4 = "lifepo4"
-    lithiumion = "lithiumion"
-    itech120x = "itech120x"
-    custom = "custom"
-
-@dataclass
-class BatteryDetail:
-    battery_chemistry: str
-    volts_to_percent: list
-    critical_voltage: int
-    low_voltage: int
-    floating_voltage: float
-    charging_voltage: float
-
-BATTERIES = {
-    Battery.agm:        BatteryDetail("AGM", [10.5, 11.51, 11.66, 11.81, 11.95, 12.05, 12.15, 12.3, 12.5, 12.75, 12.8, 12.85], 11.66, 11.81, 13.6, 14.3),
-    Battery.deepcycle:  BatteryDetail("Deep-cycle", [10.5, 11.51, 11.66, 11.81, 11.95, 12.05, 12.15, 12.3, 12.5, 12.75, 12.8], 11.66, 12.05, 13.6, 14.4),
-    Battery.leadacid:   BatteryDetail("Lead-acid", [10.5, 11.31, 11.58, 11.75, 11.9, 12.06, 12.2, 12.32, 12.42, 12.5, 12.7], 12.06, 12.2, 13.7, 14.5),
-    Battery.lifepo4:    BatteryDetail("LiFePO4", [10.0, 12.0, 12.5, 12.8, 12.9, 13.0, 13.1, 13.2, 13.3, 13.4, 13.6], 10.5, 12.0, 13.5, 14.4),
-    Battery.lithiumion: BatteryDetail("Lithium-ion", [10.0, 12.0, 12.8, 12.9, 13.0, 13.05, 13.1, 13.2, 13.3, 13.4, 13.6], 10.5, 12.0, 13.5, 14.25),
-    Battery.itech120x:  BatteryDetail("iTechworld 120X (LiFePO4)", [9.5, 10.5, 12.5, 12.7, 12.8, 12.89, 12.91, 12.99, 13.01, 13.1, 13.5], 10.5, 12.5, 13.5, 14.35),
-    Battery.custom:     BatteryDetail("Custom", [10.5, 11.58, 12.06, 13.6], 12.06, 12.2, 13.7, 14.5)
-}
-
-# Can we do this with a one-liner 'any' call, and is that more efficient?  Probably!  #TODO
-CHEMISTRY_OPTION_TO_BATTERY = {
-    "AGM": Battery.agm,
-    "Deep-cycle": Battery.deepcycle,
-    "Lead-acid": Battery.leadacid,
-    "LifePO4": Battery.lifepo4,
-    "Lithium-ion": Battery.lithiumion,
-    "itech120x": Battery.itech120x,
-    "Custom": Battery.custom
-}
-
+    VOLTAGE_TREND_SHORT = "voltage_trend_5m"
+    VOLTAGE_TREND_LONG = "voltage_trend_1h"
+    TIME_TO_CRITICAL = "time_to_critical"
+    POLL_DURATION = "poll_duration"
+    POLL_DURATION_P50 = "poll_duration_p50"
+    POLL_DURATION_P95 = "poll_duration_p95"
+    CONNECT_TIME = "connect_time"
+    GATT_WAIT_TIME = "gatt_wait_time"
+    POLL_SUCCESSES = "poll_successes"
+    POLL_TIMEOUTS = "poll_timeouts"
+    POLL_ERRORS = "poll_errors"
+    CIRCUIT_BREAKER = "circuit_breaker"
+    VOLTAGE_WINDOW_MIN = "voltage_window_min"
+    VOLTAGE_WINDOW_MAX = "voltage_window_max"
+    VOLTAGE_WINDOW_MEAN = "voltage_window_mean"
 
 class BMxBluetoothDeviceData(BluetoothData):
     """Data for BMx BLE sensors."""
@@ -168,13 +146,71 @@ class BMxBluetoothDeviceData(BluetoothData):
 
         # If this is True we are currently charging
         self._charging = False
+
+        # The most recent (possibly adjusted) status
+        self._status: int | None = None
+
+        # True while the voltage is moving fast enough that the battery must be under load (or charging)
+        self._under_load = False
+
+        # The readings gathered so far in a high-rate window, while one is open
+        self._window: FrameWindow | None = None
+
+        # Whether the window sensors are showing a window, so they're cleared when a reading arrives without one
+        self._window_published = False
+
+        # When the last notification arrived while staying connected, so a connection that's gone quiet is noticed
+        self._last_notification = 0.0
+
+        # When the current held connection was started and connected, until its first reading has been timed
+        self._stream_timing: tuple[float, float] | None = None
+
+        # For the adaptive scan mode - the current interval, and the time, voltage and status it was last updated from
+        self._adaptive_interval = DEFAULT_ADAPTIVE_MIN_INTERVAL
+        self._adaptive_reading: tuple[float, int, int] | None = None
+
+        # Poll timings and outcomes, for the diagnostic sensors
+        self._metrics = PollMetrics(METRICS_WINDOW)
+
+        # Holds polls off while the device keeps failing to connect, eg. when the vehicle it's in has been driven away
+        self._breaker = CircuitBreaker(BREAKER_THRESHOLD, BREAKER_BASE_DELAY, BREAKER_MAX_DELAY, BREAKER_REOPEN_RSSI)
+
+        # The value and time each deadbanded sensor was last published
+        self._published: dict[str, tuple[float | None, float]] = {}
+
+        # Recent readings, for the trend sensors
+        self._history = VoltageHistory(HISTORY_CAPACITY, (TREND_SHORT_WINDOW, TREND_LONG_WINDOW))
+
+        # Every reading's voltage and percentage, summarised by the hour for the long-term statistics
+        self._hourly_voltage = HourlyStatistics(STATISTICS_HOURS_KEPT)
+        self._hourly_percentage = HourlyStatistics(STATISTICS_HOURS_KEPT)
         
-        # Somewhere to temporarily store GATT data, and capture that we're waiting for data
-        self._gattdata = None
+        # Somewhere to hand over GATT data while we're waiting for it, and capture that we're waiting for data
+        self._gatt_future: asyncio.Future[bytes] | None = None
         self._ignore_advertisement = False
         
-        # Somewhere to store model info for later use
+        # Somewhere to store model info and the device address for later use - the model is only
+        # remembered once it's been detected from the local name, which isn't in every advertisement
+        self._model: Models | None = None
         self._model_info = None
+        self._address = ""
+
+        # The address and model the device's name, type and manufacturer were last set for
+        self._described: tuple[str, Models] | None = None
+
+        # Config entry data, and the battery profile resolved from it
+        self._entrydata = {}
+        self._battery_profile: BatteryProfile | None = None
+        self._advertisements_only = False
+
+        # The last reading, so it can be applied again when the battery chemistry changes
+        self._last_frame: BMxFrame | None = None
+
+        # Set when a full poll has been asked for, so it happens on the next advertisement whatever the mode
+        self._poll_requested = False
+
+        # If frame capture is turned on, where every payload and advertisement is recorded
+        self._frame_recorder: FrameRecorder | None = None
 
         # Placeholder until I sort out pre-entry validity checks
         self._log_warning = True
@@ -184,28 +220,72 @@ class BMxBluetoothDeviceData(BluetoothData):
             We actually don't really need to parse the advertisement data itsekf, 
             as the characteristic data we're about to get is a superset of it """
 
-        _LOGGER.debug(f"New advertisement - {str(service_info)}")
+        # This runs for every advertisement, so the service info is only formatted if it's actually logged
+        _LOGGER.debug("New advertisement - %s", service_info)
         manufacturer_data = service_info.manufacturer_data
         address = service_info.address
-        
-        if BMx_MANUFACTURER not in manufacturer_data:   # This is the manufacturer_data key where the current battery percentage is stored (in the last array item), although as stated above we don't really need this data.  It's a useful check though
+
+        model = self._model
+        if model is None:
+            model = LOCAL_NAME_TO_MODEL.get(service_info.name)
+            if model is not None:
+                self._model = model
+            else:
+                model = next((MANUFACTURER_TO_MODEL[key] for key in manufacturer_data if key in MANUFACTURER_TO_MODEL), None)
+
+        if model is None:
             if self._log_warning:
                 self._log_warning = False
-                _LOGGER.warning(f"{service_info.address} is not a BMx Battery Monitor - manufacturer_data '{BMx_MANUFACTURER}' not present in advertisements")
+                _LOGGER.warning("%s is not a BMx Battery Monitor - no recognised local name or manufacturer_data in advertisements", service_info.address)
 
             return None
 
-        data = manufacturer_data[BMx_MANUFACTURER]
-        self.set_device_manufacturer("Shenzhen Leagend Optoelectronics")
+        # This is the manufacturer_data key where the BM2's current battery percentage is stored (in the last array item)
+        data = manufacturer_data.get(BMx_MANUFACTURER, b"")
+        if self._frame_recorder is not None:
+            self._frame_recorder.record_advertisement(address, service_info.rssi, data)
+
+        # The device's name, type and manufacturer only change if the model does, so after the first
+        # advertisement there's nothing to set
+        if self._described != (address, model):
+            self._describe_device(address, model)
+
+        # If we're never connecting, the percentage in the advertisement is all we've got - unless a battery
+        # chemistry has been chosen, when the BM2's own (optimistic) figure would just fight with the one worked
+        # out from the voltage at each full poll
+        if data and self._advertisements_only and self._battery_profile is None and model == Models.BM2:
+            self.update_sensor(
+                key = str(BMxSensor.BATTERY_PERCENT),
+                native_unit_of_measurement = PERCENTAGE,
+                native_value = data[-1],
+                device_class = SensorDeviceClass.BATTERY
+            )
 
-        model = Models.BM2   # Right now we only support the BM2
-        #model = BYTES_TO_MODEL.get(5, Models.BM2)   # Placeholder - logic required to distinguish between the BM2 and the BM6
+    def _describe_device(self, address: str, model: Models) -> None:
+        """Set the device's name, type and manufacturer, and remember which device and model they were set for"""
+
+        self._address = address
         model_info = DEVICE_TYPES[model]
         self._model_info = model_info
+        self.set_device_manufacturer("Shenzhen Leagend Optoelectronics")
         self.set_device_type(model_info.device_type)
         name = f"{model_info.device_type} ({short_address(address)})"
         self.set_device_name(name)
         self.set_title(name)
+        self._described = (address, model)
+
+    @property
+    def urgent(self) -> bool:
+        """True if the battery is charging or critical, so its connections should be given priority"""
+        return self._charging or self._status == 0
+
+    def request_poll(self) -> None:
+        """ Ask for a full poll on the next advertisement, whatever the rate limit
+            This closes the circuit breaker too, so the poll isn't held off by earlier failures
+            Has no effect when staying connected, as every reading is pushed as it arrives anyway """
+        self._poll_requested = True
+        self._breaker.record_success()
+        self._update_breaker_sensor()
 
     def poll_needed(
         self, service_info: BluetoothServiceInfo, last_poll: float | None
@@ -213,194 +293,713 @@ class BMxBluetoothDeviceData(BluetoothData):
         """
         This is called every time we get a service_info for a device. It means the
         device is working and online.
+        Even if a poll is due, it's held off while the circuit breaker is open.
         """
 
-        _LOGGER.debug(f"Inside 'poll_needed' for {service_info.address}, _ignore_advertisement = {str(self._ignore_advertisement)}, _charging = {str(self._charging)}, _model_info = {str(self._model_info)}")
+        if not self._poll_due(service_info, last_poll):
+            return False
+
+        allowed = self._breaker.allow(service_info.rssi)
+        self._update_breaker_sensor()
+        if not allowed:
+            _LOGGER.debug("Inside 'poll_needed' for %s, returning 'False' as the circuit breaker is open after %s failed polls", service_info.address, self._breaker.failures)
+        return allowed
+
+    def _poll_due(
+        self, service_info: BluetoothServiceInfo, last_poll: float | None
+    ) -> bool:
+        """Whether a poll is due, going by the connection mode and rate limit"""
+
+        _LOGGER.debug("Inside 'poll_needed' for %s, _ignore_advertisement = %s, _charging = %s, _model_info = %s", service_info.address, self._ignore_advertisement, self._charging, self._model_info)
 
         if self._ignore_advertisement == True:
-            _LOGGER.debug(f"Inside 'poll_needed' for {service_info.address}, returning 'False' as we're ignoring advertisements right now")
+            _LOGGER.debug("Inside 'poll_needed' for %s, returning 'False' as we're ignoring advertisements right now", service_info.address)
             return False
 
+        connection_mode = self._entrydata.get(CONF_CONNECTION_MODE, DEFAULT_CONNECTION_MODE)
+
+        if connection_mode == "Stay connected":
+            _LOGGER.debug("Inside 'poll_needed' for %s, returning 'False' as we're staying connected and notifications are pushed as they arrive", service_info.address)
+            return False
+
+        if self._poll_requested == True:
+            _LOGGER.debug("Inside 'poll_needed' for %s, returning 'True' as a poll has been requested", service_info.address)
+            self._poll_requested = False
+            return True
+
+        if connection_mode == "Advertisements only (never connect)":
+            # Full polls only happen on a much slower schedule, or never if the interval is 0
+            poll_interval = self._entrydata.get(CONF_ADVERTISEMENT_POLL_INTERVAL, DEFAULT_ADVERTISEMENT_POLL_INTERVAL)
+            pollneeded = poll_interval > 0 and (last_poll is None or last_poll > poll_interval)
+            _LOGGER.debug("Inside 'poll_needed' for %s - advertisements only, poll_interval = %s, returning poll_needed == %s", service_info.address, poll_interval, pollneeded)
+            return pollneeded
+
         if last_poll is None:
-            _LOGGER.debug(f"Inside 'poll_needed' for {service_info.address}, returning 'True' as this is the first poll")
+            _LOGGER.debug("Inside 'poll_needed' for %s, returning 'True' as this is the first poll", service_info.address)
             return True
 
         scan_mode = self._entrydata.get(CONF_SCAN_MODE, DEFAULT_SCAN_MODE)
-        _LOGGER.debug("Inside 'poll_needed' for {service_info.address}, scan_mode = %s", scan_mode)
+        _LOGGER.debug("Inside 'poll_needed' for %s, scan_mode = %s", service_info.address, scan_mode)
 
         if scan_mode == "Never rate limit sensor updates":
-            _LOGGER.debug(f"Inside 'poll_needed' for {service_info.address} - sensor updates not rate-limited, returning poll_needed == True")
+            _LOGGER.debug("Inside 'poll_needed' for %s - sensor updates not rate-limited, returning poll_needed == True", service_info.address)
             return True
         elif scan_mode == "Only rate limit when not charging" and self._charging == True:
-            _LOGGER.debug(f"Inside 'poll_needed' for {service_info.address} - sensor updates not rate-limited during charging, returning poll_needed == True")
+            _LOGGER.debug("Inside 'poll_needed' for %s - sensor updates not rate-limited during charging, returning poll_needed == True", service_info.address)
             return True
+        elif scan_mode == "Adaptive (poll faster while the voltage is changing)":
+            pollneeded = last_poll > self._adaptive_interval
+            _LOGGER.debug("Inside 'poll_needed' for %s, adaptive interval = %s, last_poll = %s, returning poll_needed == %s", service_info.address, self._adaptive_interval, last_poll, pollneeded)
+            return pollneeded
     
         update_interval = self._entrydata.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
-        _LOGGER.debug(f"Inside 'poll_needed' for {service_info.address}, update_interval = {str(update_interval)}, last_poll = {last_poll}")
+        _LOGGER.debug("Inside 'poll_needed' for %s, update_interval = %s, last_poll = %s", service_info.address, update_interval, last_poll)
 
         pollneeded = last_poll > update_interval
-        _LOGGER.debug(f"Inside 'poll_needed' for {service_info.address}, sensor updates rate-limited, returning poll_needed == {str(pollneeded)}")
+        _LOGGER.debug("Inside 'poll_needed' for %s, sensor updates rate-limited, returning poll_needed == %s", service_info.address, pollneeded)
 
         return pollneeded
 
     @retry_bluetooth_connection_error()
-    async def _get_payload(self, client: BleakClientWithServiceCache) -> None:
-        """Get the payload from BM2 using its gatt_characteristic."""
+    async def _get_payload(self, client: BleakClientWithServiceCache) -> bool:
+        """ Get the payload from the BMx using its gatt_characteristic, asking for it first if the model needs asking
+            Returns True if a reading was received """
 
         if client is not None and self._model_info is not None:
-            ticks = 0
-            self._gattdata = None
+            # The notification handler resolves this future, so decoding starts the moment the data lands
+            self._gatt_future = asyncio.get_running_loop().create_future()
             
             # While we're waiting for the data to come through, we should stop handling advertisements, as sometimes it takes a few seconds
-            self._ignoreadvertisement = True
-    
-            await client.start_notify(self._model_info.characteristic, self.notification_handler)
-            while (self._gattdata is None) and (ticks < GATT_TIMEOUT * 4):
-                await asyncio.sleep(0.25)
-                ticks += 1
-    
-            await client.stop_notify(self._model_info.characteristic)
-            self._ignore_advertisement = False
+            self._ignore_advertisement = True
+
+            try:
+                started = time.perf_counter()
+                await client.start_notify(self._model_info.characteristic, self.notification_handler)
+                subscribed = time.perf_counter()
+                self._metrics.record(PHASE_SUBSCRIBE, subscribed - started)
+                await self._request_reading(client)
+                try:
+                    frame = await asyncio.wait_for(self._gatt_future, GATT_TIMEOUT)
+                    self._metrics.record(PHASE_GATT_WAIT, time.perf_counter() - subscribed)
+                except asyncio.TimeoutError:
+                    frame = None
+                    self._metrics.timeouts += 1
+                    _LOGGER.debug("Timed out after %s seconds waiting for characteristic %s", GATT_TIMEOUT, self._model_info.characteristic)
+
+                # While the battery is charging or under load, stay subscribed for a while and publish a summary of
+                # everything that comes in, rather than just the one reading
+                window = None
+                if frame is not None and (window_length := self._high_rate_window_length()):
+                    _LOGGER.debug("Staying subscribed to %s for a %s second high-rate window", client.address, window_length)
+                    self._add_to_window(frame)
+                    await asyncio.sleep(window_length)
+                    window = self._window
+
+                # The device may have dropped the connection during a long window, but we've got what we came for
+                if client.is_connected:
+                    await client.stop_notify(self._model_info.characteristic)
+            finally:
+                self._gatt_future = None
+                self._window = None
+                self._ignore_advertisement = False
     
-            if self._gattdata is not None:
+            if frame is not None:
                 _LOGGER.debug("Successfully read characteristic %s", self._model_info.characteristic)
-    
-                """ We need to decrypt the response """
-                key = bytearray([(b&255) for b in [108,101,97,103,101,110,100,-1,-2,49,56,56,50,52,54,54]])
-                cipher = AES.new(key, AES.MODE_CBC, 16 * b'\0')
-                ble_msg = cipher.decrypt(self._gattdata)
-                raw = binascii.hexlify(ble_msg).decode()
-        
-                voltage = int(raw[2:5],16) / 100.0
-                percentage = int(raw[6:8],16)
-                status = int(raw[5:6],16)
-                _LOGGER.debug(f"Raw characteristic data for {client.address} : voltage = {str(voltage)}, percentage = {str(percentage)}, status = {str(status)}")
-    
-                """ Carry out any adjustments as defined by the battery type
-                    In keeping with the oralb-ble implementation, at each poll we're doing a battery type lookup
-                    Seems a bit inefficient, in the future I'll probably change this to only capture it once at
-                    startup, and if the options change """
-    
-                battery_option = self._entrydata.get(CONF_BATTERY_TYPE, DEFAULT_BATTERY_TYPE)
-                
-                # We only need to make potential adjustments to status and percentage if a specific battery chemistry has been selected
-                if battery_option != "Automatic (via BM2)":
-                    if battery_option != "Custom":
-                        battery_chemistry = CHEMISTRY_OPTION_TO_BATTERY[battery_option]
-                        battery_detail = BATTERIES[battery_chemistry]
-                        custom = False
-                    else:
-                        battery_detail = BATTERIES["custom"]
-                        battery_detail.battery_chemistry = self._entrydata.get(CONF_CUSTOM_BATTERY_CHEMISTRY, DEFAULT_CUSTOM_BATTERY_CHEMISTRY)
-                        battery_detail.volts_to_percent = self._entrydata.get(CONF_CUSTOM_NUMPY_VOLTS, DEFAULT_CUSTOM_NUMPY_VOLTS)
-                        battery_detail.critical_voltage = self._entrydata.get(CONF_CUSTOM_CRITICAL_VOLTAGE, DEFAULT_CUSTOM_CRITICAL_VOLTAGE)
-                        battery_detail.low_voltage = self._entrydata.get(CONF_CUSTOM_LOW_VOLTAGE, DEFAULT_CUSTOM_LOW_VOLTAGE)
-                        battery_detail.floating_voltage = self._entrydata.get(CONF_CUSTOM_FLOATING_VOLTAGE, DEFAULT_CUSTOM_FLOATING_VOLTAGE)
-                        battery_detail.charging_voltage = self._entrydata.get(CONF_CUSTOM_CHARGING_VOLTAGE, DEFAULT_CUSTOM_CHARGING_VOLTAGE)
-                        custom = True
-                        _LOGGER.error ("Using custom battery values: " + str(battery_detail))
-    
-                    percentage = self._adjust_percentage(percentage, battery_detail, voltage, custom)
-                    status = self._adjust_status(status, battery_detail, voltage)
-    
-                    _LOGGER.debug("Adjusted characteristic data: percentage = %s, status = %s", str(percentage), str(status))
-                
-                # Convert status into something human_readable
-                status_text = BATTERY_STATUS_LIST.get(status, "Unknown")
-                
-                self.update_sensor(
-                    key = str(BMxSensor.BATTERY_PERCENT),
-                    native_unit_of_measurement = PERCENTAGE,
-                    native_value = percentage,
-                    device_class = SensorDeviceClass.BATTERY
-                )
+                if window is not None:
+                    self._handle_window(client.address, window)
+                else:
+                    self._handle_frame(client.address, frame)
+                    self._clear_window_sensors()
+                self._metrics.successes += 1
+                return True
+
+        return False
+
+    async def _request_reading(self, client: BleakClientWithServiceCache) -> None:
+        """Ask for a reading, for models that only send one when asked (the BM2 sends them unprompted)"""
+
+        if self._model_info.command is not None:
+            await client.write_gatt_char(self._model_info.command_characteristic, self._model_info.command(), response = True)
+
+    async def _forget_services(self, client: BleakClientWithServiceCache) -> None:
+        """Clear the Bluetooth stack's cached services after a GATT error, in case they're out of date"""
+        await client.clear_cache()
+
+    def _handle_frame(self, address: str, frame: BMxFrame, record_hourly: bool = True) -> None:
+        """ Update the sensors from a decoded characteristic payload
+            record_hourly is False for the last reading of a high-rate window, which has already been counted """
+
+        _LOGGER.debug("Raw characteristic data for %s : voltage = %s, percentage = %s, status = %s, temperature = %s", address, frame.voltage, frame.percentage, frame.status, frame.temperature)
+
+        self._last_frame = frame
+        percentage, status = self._apply_frame(frame)
+        self._update_adaptive_interval(frame.centivolts, status)
+        self._update_trends(frame.centivolts, percentage)
+
+        if record_hourly:
+            self._record_hourly(frame.voltage, percentage)
+
+    def _record_hourly(self, voltage: float, percentage: int) -> None:
+        now = time.time()
+        self._hourly_voltage.add(now, voltage)
+        self._hourly_percentage.add(now, percentage)
+
+    def _add_to_window(self, frame: BMxFrame) -> None:
+        """ Add a reading to the high-rate window, opening one if there isn't one already
+            Every reading still counts towards the hourly statistics, even though only the window is published """
+
+        if self._window is None:
+            self._window = FrameWindow(time.monotonic(), frame)
+        else:
+            self._window.add(frame)
+
+        percentage = frame.percentage if self._battery_profile is None else self._battery_profile.percentage(frame.centivolts)
+        self._record_hourly(frame.voltage, percentage)
+
+    def _handle_window(self, address: str, window: FrameWindow) -> None:
+        """Update the sensors from a high-rate window - the last reading, plus the window's voltage range and mean"""
+
+        _LOGGER.debug("High-rate window for %s : %s readings, voltage = %s to %s, mean = %s", address, window.count, window.minimum_voltage, window.maximum_voltage, window.mean_voltage)
+
+        self._handle_frame(address, window.last, record_hourly = False)
+        self._update_window_sensors(window.minimum_voltage, window.maximum_voltage, round(window.mean_voltage, 3))
+        self._window_published = True
+
+    def _clear_window_sensors(self) -> None:
+        """ Show the window sensors as unknown after a reading that wasn't part of a window (the battery's settled,
+            or windows have been turned off), rather than leaving the last window's range showing indefinitely """
+
+        if self._window_published:
+            self._update_window_sensors(None, None, None)
+            self._window_published = False
+
+    def _update_window_sensors(self, minimum: float | None, maximum: float | None, mean: float | None) -> None:
+        for key, value in (
+            (BMxSensor.VOLTAGE_WINDOW_MIN, minimum),
+            (BMxSensor.VOLTAGE_WINDOW_MAX, maximum),
+            (BMxSensor.VOLTAGE_WINDOW_MEAN, mean),
+        ):
+            self.update_sensor(
+                key = str(key),
+                native_unit_of_measurement = UnitOfElectricPotential,
+                native_value = value,
+                device_class = SensorDeviceClass.VOLTAGE
+            )
+
+    def _high_rate_window_length(self) -> float:
+        """ How long a poll should stay subscribed after its reading, gathering every notification into a window
+            Only while the battery is charging or under load, and 0 if high-rate windows are turned off """
+
+        if not (self._charging or self._under_load):
+            return 0
+        return self._entrydata.get(CONF_HIGH_RATE_WINDOW, DEFAULT_HIGH_RATE_WINDOW)
+
+    def _apply_frame(self, frame: BMxFrame) -> tuple[int, int | None]:
+        """ Work out the percentage and status under the current battery profile, and update the sensors and
+            charging flag from them - without touching the history, so the last reading can be applied again """
+
+        centivolts = frame.centivolts
+        voltage = frame.voltage
+        percentage = frame.percentage
+        status = frame.status
+
+        # We only need to make potential adjustments to status and percentage if a specific battery chemistry has been selected
+        if self._battery_profile is not None:
+            percentage = self._adjust_percentage(percentage, self._battery_profile, centivolts)
+            status = self._adjust_status(status, self._battery_profile, centivolts)
+
+            _LOGGER.debug("Adjusted characteristic data: percentage = %s, status = %s", percentage, status)
         
-                self.update_sensor(
-                    key = str(BMxSensor.BATTERY_VOLTAGE),
-                    native_unit_of_measurement = UnitOfElectricPotential,
-                    native_value = voltage,
-                    device_class = SensorDeviceClass.VOLTAGE
-                )
+        # Convert status into something human_readable
+        status_text = BATTERY_STATUS_LIST.get(status, "Unknown")
         
-                self.update_sensor(
-                    key = str(BMxSensor.BATTERY_STATUS),
-                    native_unit_of_measurement = None,
-                    native_value = status_text,
-                    device_class = None,
-                    #name = "Status"
-                )
-    
-                # Update internal charging flag
-                if status >= 4: #charging or floating, ie attached to a powered-on charger
-                    self._charging = True
-                    _LOGGER.debug("Setting self._charging = %s", str(self._charging))
-                else:
-                    self._charging = False
-                    _LOGGER.debug("Setting self._charging = %s", str(self._charging))
+        if self.records_every_reading:
+            self.update_sensor(
+                key = str(BMxSensor.BATTERY_PERCENT),
+                native_unit_of_measurement = PERCENTAGE,
+                native_value = percentage,
+                device_class = SensorDeviceClass.BATTERY
+            )
+
+            self._update_sensor_deadband(
+                key = str(BMxSensor.BATTERY_VOLTAGE),
+                native_unit_of_measurement = UnitOfElectricPotential,
+                native_value = voltage,
+                device_class = SensorDeviceClass.VOLTAGE,
+                deadband = self._entrydata.get(CONF_VOLTAGE_DEADBAND, DEFAULT_VOLTAGE_DEADBAND)
+            )
+        else:
+            # Every reading goes into the hourly statistics instead, so the sensors only need updating by the max-age heartbeat
+            self._update_sensor_deadband(
+                key = str(BMxSensor.BATTERY_PERCENT),
+                native_unit_of_measurement = PERCENTAGE,
+                native_value = percentage,
+                device_class = SensorDeviceClass.BATTERY,
+                deadband = math.inf
+            )
+
+            self._update_sensor_deadband(
+                key = str(BMxSensor.BATTERY_VOLTAGE),
+                native_unit_of_measurement = UnitOfElectricPotential,
+                native_value = voltage,
+                device_class = SensorDeviceClass.VOLTAGE,
+                deadband = math.inf
+            )
+
+        # The BM6 doesn't report a status, so unless a battery chemistry has been chosen there isn't one
+        if status is not None:
+            self.update_sensor(
+                key = str(BMxSensor.BATTERY_STATUS),
+                native_unit_of_measurement = None,
+                native_value = status_text,
+                device_class = None,
+                #name = "Status"
+            )
+
+        if frame.temperature is not None:
+            self.update_sensor(
+                key = str(BMxSensor.TEMPERATURE),
+                native_unit_of_measurement = UnitOfTemperature.CELSIUS,
+                native_value = frame.temperature,
+                device_class = SensorDeviceClass.TEMPERATURE
+            )
+
+        self._status = status
+
+        # Update internal charging flag
+        if status is not None and status >= 4: #charging or floating, ie attached to a powered-on charger
+            self._charging = True
+            _LOGGER.debug("Setting self._charging = %s", self._charging)
+        else:
+            self._charging = False
+            _LOGGER.debug("Setting self._charging = %s", self._charging)
+
+        return percentage, status
             
+    def _update_trends(self, centivolts: int, percentage: int) -> None:
+        """ Add the reading to the history and update the trend sensors from it
+            The history is only sampled every few seconds, so its fixed size always covers the longest window """
+
+        now = time.monotonic()
+        latest = self._history.latest
+        if latest is None or now - latest[0] >= HISTORY_SAMPLE_SPACING:
+            self._history.add(now, centivolts, percentage)
+
+        trend_short = self._history.slope(TREND_SHORT_WINDOW)
+        trend_long = self._history.slope(TREND_LONG_WINDOW)
+
+        # How long until we hit the critical voltage at the current rate of discharge, if we know what that is
+        time_to_critical = None
+        if self._battery_profile is not None and trend_long is not None and trend_long < 0:
+            time_to_critical = max(0.0, (centivolts / 100 - self._battery_profile.critical_voltage) / -trend_long)
+
+        self._update_sensor_deadband(
+            key = str(BMxSensor.VOLTAGE_TREND_SHORT),
+            native_unit_of_measurement = None,
+            native_value = None if trend_short is None else round(trend_short, 3),
+            device_class = None,
+            deadband = TREND_DEADBAND
+        )
+
+        self._update_sensor_deadband(
+            key = str(BMxSensor.VOLTAGE_TREND_LONG),
+            native_unit_of_measurement = None,
+            native_value = None if trend_long is None else round(trend_long, 3),
+            device_class = None,
+            deadband = TREND_DEADBAND
+        )
+
+        self._update_sensor_deadband(
+            key = str(BMxSensor.TIME_TO_CRITICAL),
+            native_unit_of_measurement = None,
+            native_value = None if time_to_critical is None else round(time_to_critical, 1),
+            device_class = SensorDeviceClass.DURATION,
+            deadband = TIME_TO_CRITICAL_DEADBAND
+        )
+
+    def _update_sensor_deadband(
+        self,
+        key: str,
+        native_unit_of_measurement,
+        native_value: float | None,
+        device_class: SensorDeviceClass | None,
+        deadband: float
+    ) -> None:
+        """ Update a sensor only if its value has moved by at least deadband since it was last published,
+            or the last published value is older than the max age - otherwise the sensor keeps its previous
+            value, so nothing is written to Home Assistant's state machine or recorder """
+
+        now = time.monotonic()
+        published = self._published.get(key)
+        if published is not None and native_value is not None and published[0] is not None:
+            last_value, last_time = published
+            max_age = self._entrydata.get(CONF_PUBLISH_MAX_AGE, DEFAULT_PUBLISH_MAX_AGE)
+            # Rounded, so a 0.02V deadband isn't missed by a 0.019999... difference
+            if round(abs(native_value - last_value), 6) < deadband and now - last_time < max_age:
+                return
+
+        self._published[key] = (native_value, now)
+        self.update_sensor(
+            key = key,
+            native_unit_of_measurement = native_unit_of_measurement,
+            native_value = native_value,
+            device_class = device_class
+        )
+
+    def _update_adaptive_interval(self, centivolts: int, status: int) -> None:
+        """ Snap back to the minimum interval while the voltage is changing or the status has just changed,
+            otherwise double the interval (up to the maximum) - a resting battery barely moves """
+
+        now = time.monotonic()
+        min_interval = self._entrydata.get(CONF_ADAPTIVE_MIN_INTERVAL, DEFAULT_ADAPTIVE_MIN_INTERVAL)
+        max_interval = self._entrydata.get(CONF_ADAPTIVE_MAX_INTERVAL, DEFAULT_ADAPTIVE_MAX_INTERVAL)
+
+        if self._adaptive_reading is None:
+            active = True
+        else:
+            last_time, last_centivolts, last_status = self._adaptive_reading
+            change = abs(centivolts - last_centivolts)
+            hours = (now - last_time) / 3600
+            self._under_load = change > ADAPTIVE_NOISE_CENTIVOLTS and hours > 0 and change / 100 / hours >= ADAPTIVE_ACTIVE_RATE
+            active = status != last_status or self._under_load
+
+        self._adaptive_reading = (now, centivolts, status)
+        if active:
+            self._adaptive_interval = min_interval
+        else:
+            self._adaptive_interval = min(self._adaptive_interval * 2, max_interval)
+        self._adaptive_interval = max(self._adaptive_interval, min_interval)
+
+        _LOGGER.debug("Adaptive interval is now %s seconds (voltage changing = %s)", self._adaptive_interval, active)
+
     def notification_handler(self, sender, data):
         """Simple bluetooth notification handler"""
-        self._gattdata = data
+        if self._frame_recorder is not None:
+            self._frame_recorder.record_gatt(self._address, data)
+
+        # Once the reading we asked for is in, we only want more if a high-rate window is open
+        collecting = self._window is not None
+        if not collecting and (self._gatt_future is None or self._gatt_future.done()):
+            return
+
+        # Decode straight away, as some models send other messages before the reading we asked for
+        started = time.perf_counter()
+        try:
+            frame = self._model_info.decode(data)
+        except ValueError as err:
+            _LOGGER.debug("Unable to decode notification: %s", err)
+            return
+        self._metrics.record(PHASE_DECODE, time.perf_counter() - started)
+
+        if frame is None:
+            return
+        if collecting:
+            self._add_to_window(frame)
+        else:
+            self._gatt_future.set_result(frame)
 
     async def async_poll(self, ble_device: BLEDevice) -> SensorUpdate:
         """
         Poll the device to retrieve percentage, status and voltage
+        Connection errors are raised, so the caller can count them towards the circuit breaker
         """
+        _LOGGER.debug("Connecting to Bluetooth device %s", ble_device.address)
+        started = time.perf_counter()
         try:
-            _LOGGER.debug(f"Connecting to Bluetooth device {ble_device.address}")
             client = await establish_connection(
                 BleakClientWithServiceCache, ble_device, ble_device.address
             )
-        except Exception as ex:
-            _LOGGER.debug(f"Error {ex} connecting to Bluetooth device {ble_device.address}.  client = {client}")
+        except (BleakError, asyncio.TimeoutError):
+            self._metrics.errors += 1
+            raise
 
-        if not client is None:
-            _LOGGER.debug(f"Connected to BM2 device {ble_device.address} - client = {client}")
-    
+        self._metrics.record(PHASE_CONNECT, time.perf_counter() - started)
+        _LOGGER.debug("Connected to BM2 device %s - client = %s", ble_device.address, client)
+
+        received = False
+        try:
+            _LOGGER.debug("Waiting for _get_payload to complete for device %s", ble_device.address)
+            received = await self._get_payload(client)
+        except BleakError as err:
+            self._metrics.errors += 1
+            _LOGGER.warning("Reading gatt characters failed with error %s", err)
+            await self._forget_services(client)
+        finally:
+            await client.disconnect()
+            _LOGGER.debug("Disconnected from active bluetooth client")
+
+        if received:
+            self._breaker.record_success()
+            self._update_breaker_sensor()
+        else:
+            self.record_poll_failure()
+
+        self._metrics.record(PHASE_TOTAL, time.perf_counter() - started)
+        self._update_metrics()
+        return self._finish_update()
+
+    def record_poll_failure(self) -> None:
+        """ Count a poll that didn't get a reading towards opening the circuit breaker
+            Connection errors are raised by async_poll instead, and the hub records those as it catches them """
+        self._breaker.record_failure()
+        self._update_breaker_sensor()
+
+    def _update_breaker_sensor(self) -> None:
+        self.update_sensor(
+            key = str(BMxSensor.CIRCUIT_BREAKER),
+            native_unit_of_measurement = None,
+            native_value = self._breaker.state,
+            device_class = None
+        )
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """The circuit breaker holding polls off for this device"""
+        return self._breaker
+
+    @property
+    def metrics(self) -> PollMetrics:
+        """Poll timings and outcomes for this device"""
+        return self._metrics
+
+    def _update_metrics(self) -> None:
+        """Update the diagnostic sensors from the poll metrics"""
+
+        for key, value in (
+            (BMxSensor.POLL_DURATION, self._metrics.last(PHASE_TOTAL)),
+            (BMxSensor.POLL_DURATION_P50, self._metrics.percentile(PHASE_TOTAL, 50)),
+            (BMxSensor.POLL_DURATION_P95, self._metrics.percentile(PHASE_TOTAL, 95)),
+            (BMxSensor.CONNECT_TIME, self._metrics.last(PHASE_CONNECT)),
+            (BMxSensor.GATT_WAIT_TIME, self._metrics.last(PHASE_GATT_WAIT)),
+        ):
+            self.update_sensor(
+                key = str(key),
+                native_unit_of_measurement = None,
+                native_value = None if value is None else round(value),
+                device_class = SensorDeviceClass.DURATION
+            )
+
+        for key, value in (
+            (BMxSensor.POLL_SUCCESSES, self._metrics.successes),
+            (BMxSensor.POLL_TIMEOUTS, self._metrics.timeouts),
+            (BMxSensor.POLL_ERRORS, self._metrics.errors),
+        ):
+            self.update_sensor(
+                key = str(key),
+                native_unit_of_measurement = None,
+                native_value = value,
+                device_class = None
+            )
+
+    async def async_stream(
+        self,
+        ble_device_callback: Callable[[], BLEDevice | None],
+        update_callback: Callable[[SensorUpdate], None],
+        connection_slot: Callable[[], AbstractAsyncContextManager[None]] | None = None,
+        lost_callback: Callable[[], None] | None = None,
+    ) -> None:
+        """
+        Stay connected to the device and push every decoded notification to update_callback
+        Runs until cancelled, reconnecting with an increasing delay whenever the connection drops (or goes quiet),
+        and calling lost_callback, if given, each time it does
+        If connection_slot is given, the slot it returns is held from each connection attempt until disconnecting
+        """
+        delay = STREAM_RECONNECT_MIN_DELAY
+
+        while True:
+            ble_device = ble_device_callback()
+
+            # We need at least one advertisement to know which characteristic to subscribe to
+            if ble_device is not None and self._model_info is not None:
+                disconnected = asyncio.Event()
+                client = None
+                # Anything left over from the last connection is too old to be part of the next window
+                self._window = None
+
+                # The connection ties up the adapter or proxy for as long as it's held open, so the slot is held
+                # until we've disconnected rather than just while connecting
+                try:
+                    async with connection_slot() if connection_slot is not None else nullcontext():
+                        try:
+                            _LOGGER.debug("Connecting to Bluetooth device %s to stream notifications", ble_device.address)
+                            started = time.perf_counter()
+                            client = await establish_connection(
+                                BleakClientWithServiceCache,
+                                ble_device,
+                                ble_device.address,
+                                disconnected_callback = lambda _client: disconnected.set(),
+                                ble_device_callback = ble_device_callback
+                            )
+                            connected = time.perf_counter()
+                            self._metrics.record(PHASE_CONNECT, connected - started)
+                            # Each connection is timed like a poll, up to its first reading
+                            self._stream_timing = (started, connected)
+                            await client.start_notify(
+                                self._model_info.characteristic,
+                                partial(self._stream_notification_handler, client.address, update_callback)
+                            )
+                            self._metrics.record(PHASE_SUBSCRIBE, time.perf_counter() - connected)
+                            # Once asked, models that need asking carry on sending readings for as long as we're connected
+                            await self._request_reading(client)
+
+                            # Connected and subscribed, so the next drop starts the backoff from scratch
+                            _LOGGER.debug("Streaming notifications from Bluetooth device %s", ble_device.address)
+                            delay = STREAM_RECONNECT_MIN_DELAY
+                            self._last_notification = time.monotonic()
+                            await self._async_wait_until_lost(disconnected)
+                            _LOGGER.debug("Lost streaming connection to Bluetooth device %s", ble_device.address)
+                        except (BleakError, asyncio.TimeoutError) as err:
+                            _LOGGER.debug("Error %s streaming from Bluetooth device %s", err, ble_device.address)
+                            # Not pushed straight away, as a push marks the device available - the next reading carries it
+                            self._metrics.errors += 1
+                            self._update_metrics()
+                            # An error while we're still connected is a GATT error, so the cached services may be to blame
+                            if isinstance(err, BleakError) and client is not None and client.is_connected:
+                                await self._forget_services(client)
+                        finally:
+                            if client is not None and client.is_connected:
+                                await client.disconnect()
+                except SlotUnavailableError as err:
+                    # The adapter or proxy has no slot to spare, so wait and try again like any other failed connection
+                    _LOGGER.debug("Not streaming from %s yet: %s", ble_device.address, err)
+
+                if lost_callback is not None:
+                    lost_callback()
+
+            _LOGGER.debug("Retrying streaming connection in %s seconds", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STREAM_RECONNECT_MAX_DELAY)
+
+    async def _async_wait_until_lost(self, disconnected: asyncio.Event) -> None:
+        """ Wait until the connection drops, or no notification has arrived for a while - a connection can stay
+            up without the device sending anything, and that mustn't keep the sensors looking current """
+
+        while not disconnected.is_set():
             try:
-                _LOGGER.debug(f"Waiting for _get_payload to complete for device {ble_device.address}")
-                await self._get_payload(client)
-            except BleakError as err:
-                _LOGGER.warning(f"Reading gatt characters failed with error {err}")
-            finally:
-                await client.disconnect()
-                _LOGGER.debug("Disconnected from active bluetooth client")
-            return self._finish_update()
+                await asyncio.wait_for(disconnected.wait(), STREAM_STALE_TIMEOUT)
+            except asyncio.TimeoutError:
+                if time.monotonic() - self._last_notification >= STREAM_STALE_TIMEOUT:
+                    _LOGGER.debug("No notifications from %s for %s seconds, reconnecting", self._address, STREAM_STALE_TIMEOUT)
+                    return
+
+    def _stream_notification_handler(
+        self,
+        address: str,
+        update_callback: Callable[[SensorUpdate], None],
+        sender,
+        data
+    ) -> None:
+        """Bluetooth notification handler used while staying connected"""
+        self._last_notification = time.monotonic()
+        if self._frame_recorder is not None:
+            self._frame_recorder.record_gatt(address, data)
+
+        started = time.perf_counter()
+        try:
+            frame = self._model_info.decode(data)
+        except ValueError as err:
+            _LOGGER.warning("Unable to decode notification from %s: %s", address, err)
+            return
+        self._metrics.record(PHASE_DECODE, time.perf_counter() - started)
+
+        # Not a reading, so one of the BM6's other messages
+        if frame is None:
+            return
+
+        self._metrics.successes += 1
+        if self._stream_timing is not None:
+            connection_started, connected = self._stream_timing
+            self._stream_timing = None
+            self._metrics.record(PHASE_GATT_WAIT, started - connected)
+            self._metrics.record(PHASE_TOTAL, started - connection_started)
+
+        window_length = self._entrydata.get(CONF_HIGH_RATE_WINDOW, DEFAULT_HIGH_RATE_WINDOW)
+        if not window_length:
+            self._handle_frame(address, frame)
+            self._clear_window_sensors()
+            self._update_metrics()
+            update_callback(self._finish_update())
+            return
+
+        # Gather the readings into windows, and only publish once each window is up
+        self._add_to_window(frame)
+        if time.monotonic() - self._window.started >= window_length:
+            window, self._window = self._window, None
+            self._handle_window(address, window)
+            self._update_metrics()
+            update_callback(self._finish_update())
+
+
+    def set_frame_recorder(self, frame_recorder: FrameRecorder | None) -> None:
+        """Record every GATT payload and advertisement seen to frame_recorder, or stop recording if it's None"""
+        self._frame_recorder = frame_recorder
+
+    def set_entry_data(self, entrydata) -> None:
+        """ Store the config entry data and resolve the battery profile from it
+            This is only done at setup and when the options change, never on the poll path """
+
+        self._entrydata = entrydata
+        self._battery_profile = build_battery_profile(entrydata)
+        self._advertisements_only = (
+            entrydata.get(CONF_CONNECTION_MODE, DEFAULT_CONNECTION_MODE) == "Advertisements only (never connect)"
+        )
+        _LOGGER.debug("Using battery profile %s", self._battery_profile)
+
+        # Keep the adaptive interval within the (possibly new) limits
+        min_interval = entrydata.get(CONF_ADAPTIVE_MIN_INTERVAL, DEFAULT_ADAPTIVE_MIN_INTERVAL)
+        max_interval = entrydata.get(CONF_ADAPTIVE_MAX_INTERVAL, DEFAULT_ADAPTIVE_MAX_INTERVAL)
+        self._adaptive_interval = max(min(self._adaptive_interval, max_interval), min_interval)
+
+    @property
+    def entry_data(self):
+        """The config entry data currently in use"""
+        return self._entrydata
+
+    @property
+    def records_every_reading(self) -> bool:
+        """ False if the voltage and percentage sensors are only updated by the max-age heartbeat, leaving
+            every reading to the hourly statistics """
+        return self._entrydata.get(CONF_RECORD_EVERY_READING, DEFAULT_RECORD_EVERY_READING)
+
+    def hourly_state(self) -> dict[str, Any]:
+        """The hourly statistics not yet taken, including the hour so far, so they can be saved"""
+        return {"voltage": self._hourly_voltage.as_dict(), "percent": self._hourly_percentage.as_dict()}
+
+    def restore_hourly_state(self, state: Mapping[str, Any]) -> None:
+        """Carry on with the hourly statistics saved by hourly_state, eg. before a restart or reload"""
+        self._hourly_voltage.restore(state["voltage"])
+        self._hourly_percentage.restore(state["percent"])
+
+    def take_hourly_statistics(self) -> tuple[list[HourSummary], list[HourSummary]]:
+        """The voltage and percentage statistics for each hour completed since they were last taken"""
+        return self._hourly_voltage.take(), self._hourly_percentage.take()
+
+    def reapply_last_reading(self) -> SensorUpdate | None:
+        """ Apply the last reading again under the current battery profile, after the options have changed
+            Returns the resulting update, or None if there hasn't been a reading yet """
+
+        if self._last_frame is None:
+            return None
 
+        # Publish whatever the new options give, rather than holding it back until the next heartbeat
+        self._published.clear()
+        self._apply_frame(self._last_frame)
+        return self._finish_update()
 
-    def _adjust_percentage(self, raw_percentage: int, battery_detail, voltage: float, custom: bool = False) -> int:
-        """ Use battery_detail to determine if we need to adjust the percentage based on voltage
+    def _adjust_percentage(self, raw_percentage: int, battery_profile: BatteryProfile, centivolts: int) -> int:
+        """ Use battery_profile to determine if we need to adjust the percentage based on voltage
             BM2's default percentage and status values are extremely optimistic! """
 
-        # Using numpy for voltage/percentage calculation interpolation
-        if not custom:
-            np_percent = [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100]
-        else:
-            np_percent = [0, 20, 50, 100]
-
-        np_voltage = battery_detail.volts_to_percent
-        new_percentage = int(np.interp(voltage, np_voltage, np_percent))
-        _LOGGER.debug ("Adjusting percentage based on battery chemistry of %s: actual voltage = %s, raw percentage = %s, updated percentage = %s", battery_detail.battery_chemistry, str(voltage), str(raw_percentage), str(new_percentage))
+        new_percentage = battery_profile.percentage(centivolts)
+        _LOGGER.debug ("Adjusting percentage based on battery chemistry of %s: actual voltage = %s, raw percentage = %s, updated percentage = %s", battery_profile.battery_chemistry, centivolts / 100.0, raw_percentage, new_percentage)
 
         return new_percentage
 
-    def _adjust_status(self, raw_status: int, battery_detail, voltage: float) -> int:
-        """ Use battery_detail to determine if we need to adjust the status based on voltage
-            BM2's default percentage and status values are extremely optimistic!
-            Obviously I'd prefer to use 4 for floating and 8 for charging, but the
-            BM2 doesn't distinguish between the two """
-
-        if voltage >= battery_detail.charging_voltage:
-            new_status =  4    # Charging
-        elif voltage >= battery_detail.floating_voltage:
-            new_status =  8    # Floating
-        elif voltage <= battery_detail.critical_voltage:
-            new_status =  0    # Critical
-        elif voltage <= battery_detail.low_voltage:
-            new_status =  1    # Low
-        else:
-            new_status =  2    # Normal
-        
-        _LOGGER.debug ("Adjusting state based on battery chemistry of %s: critical voltage = %s, low voltage = %s, float voltage = %s, charging voltage = %s, actual voltage = %s, raw state = %s, updated state = %s", battery_detail.battery_chemistry, str(battery_detail.critical_voltage), str(battery_detail.low_voltage), str(battery_detail.floating_voltage), str(battery_detail.charging_voltage), str(voltage), str(raw_status), str(new_status))
+    def _adjust_status(self, raw_status: int, battery_profile: BatteryProfile, centivolts: int) -> int:
+        """ Use battery_profile to determine if we need to adjust the status based on voltage
+            BM2's default percentage and status values are extremely optimistic! """
+
+        new_status = battery_profile.status(centivolts)
+        _LOGGER.debug ("Adjusting state based on battery chemistry of %s: critical voltage = %s, low voltage = %s, float voltage = %s, charging voltage = %s, actual voltage = %s, raw state = %s, updated state = %s", battery_profile.battery_chemistry, battery_profile.critical_voltage, battery_profile.low_voltage, battery_profile.floating_voltage, battery_profile.charging_voltage, centivolts / 100.0, raw_status, new_status)
         
         return new_status
@@ -0,0 +1,90 @@
+"""Per-device circuit breaker for the BM2 battery monitor integration."""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+# Circuit breaker states, as shown by the diagnostic sensor
+BREAKER_CLOSED = "Closed"
+BREAKER_OPEN = "Open"
+BREAKER_RETRYING = "Retrying"
+
+
+class CircuitBreaker:
+    """ Stops a device that keeps failing to connect from being polled on every advertisement
+        After threshold consecutive failures polls are held off, for a delay that doubles with each further
+        failure (up to max_delay).  An advertisement at reopen_rssi or stronger lets a poll through early, but
+        only if the signal was weaker than that when the last poll failed - ie the device has come back into
+        range - and only once per delay, so a device that's close by but failing can't defeat the backoff """
+
+    def __init__(self, threshold: int, base_delay: float, max_delay: float, reopen_rssi: int) -> None:
+        self._threshold = threshold
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._reopen_rssi = reopen_rssi
+
+        self._failures = 0
+        self._open_until = 0.0
+        self._last_rssi: int | None = None
+        self._failure_rssi: int | None = None
+        self._reopened_early = False
+
+    @property
+    def failures(self) -> int:
+        """Consecutive failures so far"""
+        return self._failures
+
+    @property
+    def state(self) -> str:
+        """Closed (polling normally), open (holding polls off) or retrying (the next advertisement lets a poll through)"""
+        if self._failures < self._threshold:
+            return BREAKER_CLOSED
+        if time.monotonic() < self._open_until:
+            return BREAKER_OPEN
+        return BREAKER_RETRYING
+
+    def allow(self, rssi: int | None) -> bool:
+        """Whether a poll can go ahead, given the RSSI of the advertisement that prompted it"""
+
+        self._last_rssi = rssi
+        if self._failures < self._threshold or time.monotonic() >= self._open_until:
+            return True
+
+        if (
+            not self._reopened_early
+            and rssi is not None
+            and rssi >= self._reopen_rssi
+            and (self._failure_rssi is None or self._failure_rssi < self._reopen_rssi)
+        ):
+            self._reopened_early = True
+            return True
+
+        return False
+
+    def record_success(self) -> None:
+        """Close the breaker"""
+        self._failures = 0
+        self._open_until = 0.0
+        self._failure_rssi = None
+        self._reopened_early = False
+
+    def record_failure(self) -> None:
+        """Count a failed poll, opening the breaker (or holding it open for longer) once there have been enough"""
+        self._failures += 1
+        self._failure_rssi = self._last_rssi
+        self._reopened_early = False
+        if self._failures >= self._threshold:
+            self._open_until = time.monotonic() + self._delay()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Everything we know, for diagnostics"""
+        return {
+            "state": self.state,
+            "failures": self._failures,
+            "retry_in": max(0.0, round(self._open_until - time.monotonic(), 1)),
+            "failure_rssi": self._failure_rssi,
+        }
+
+    def _delay(self) -> float:
+        return min(self._base_delay * 2 ** (self._failures - self._threshold), self._max_delay)
@@ -0,0 +1,140 @@
+"""Raw frame capture and replay for the BM2 battery monitor integration.
+
+Captures are append-only files of fixed-size records, so they can be
+memory-mapped and replayed at full speed through the same decoding and
+battery profile code as the live poll path.  Nothing here depends on Home
+Assistant, so offline tools can use it too.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+from collections.abc import Callable, Iterator
+from typing import NamedTuple
+
+from .battery import BatteryProfile
+from .protocol import BMxFrame, decode_bm2_frame
+
+CAPTURE_MAGIC = b"BM2CAP\x00\x01"    # File signature and format version
+
+# timestamp, kind, address, rssi, payload length, payload (zero padded) - 48 bytes in all
+RECORD = struct.Struct("<dB6sbB31s")
+
+KIND_GATT = 1
+KIND_ADVERTISEMENT = 2
+
+
+class CaptureRecord(NamedTuple):
+    """One captured GATT payload or advertisement"""
+
+    timestamp: float
+    kind: int
+    address: str
+    rssi: int
+    payload: bytes
+
+
+class ReplayedFrame(NamedTuple):
+    """A captured GATT payload, decoded and adjusted for a battery profile"""
+
+    record: CaptureRecord
+    frame: BMxFrame
+    percentage: int
+    status: int | None
+
+
+class FrameRecorder:
+    """ Buffers capture records in memory, to be written out in bulk
+        take() is cheap enough to call from the event loop, while write() does blocking I/O """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._buffer = bytearray()
+
+    def record_gatt(self, address: str, payload: bytes) -> None:
+        """Capture an encrypted GATT payload"""
+        self._append(KIND_GATT, address, 0, payload)
+
+    def record_advertisement(self, address: str, rssi: int, manufacturer_data: bytes) -> None:
+        """Capture the manufacturer data from an advertisement"""
+        self._append(KIND_ADVERTISEMENT, address, rssi, manufacturer_data)
+
+    def take(self) -> bytes:
+        """Hand over everything buffered so far, ready to be written"""
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def write(self, data: bytes) -> None:
+        """Append records to the capture file, creating it (and its directory) if needed"""
+        if not data:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "ab") as capture:
+            if capture.tell() == 0:
+                capture.write(CAPTURE_MAGIC)
+            capture.write(data)
+
+    def _append(self, kind: int, address: str, rssi: int, payload: bytes) -> None:
+        payload = payload[:31]
+        self._buffer += RECORD.pack(
+            time.time(), kind, _pack_address(address), max(-128, min(127, rssi)), len(payload), payload
+        )
+
+
+def iter_capture(path: str) -> Iterator[CaptureRecord]:
+    """Read every record from a capture file, ignoring any partly-written record at the end"""
+
+    with open(path, "rb") as capture:
+        if os.fstat(capture.fileno()).st_size <= len(CAPTURE_MAGIC):
+            return
+        with mmap.mmap(capture.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if mapped[:len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+                raise ValueError(f"{path} is not a BM2 capture file")
+
+            # The memoryview has to be released before the map can be closed
+            view = memoryview(mapped)
+            records = view[len(CAPTURE_MAGIC):len(view) - (len(view) - len(CAPTURE_MAGIC)) % RECORD.size]
+            try:
+                for timestamp, kind, address, rssi, length, payload in RECORD.iter_unpack(records):
+                    yield CaptureRecord(timestamp, kind, address.hex(":").upper(), rssi, payload[:length])
+            finally:
+                records.release()
+                view.release()
+
+
+def replay_capture(
+    path: str,
+    battery_profile: BatteryProfile | None,
+    decode: Callable[[bytes], BMxFrame | None] = decode_bm2_frame
+) -> Iterator[ReplayedFrame]:
+    """ Push every captured GATT payload through the live decoding and battery profile code
+        With no profile, the device's own percentage and status are passed through as they are
+        decode is the model's decoder - payloads it doesn't recognise as readings are skipped """
+
+    for record in iter_capture(path):
+        if record.kind != KIND_GATT:
+            continue
+        frame = decode(record.payload)
+        if frame is None:
+            continue
+        if battery_profile is None:
+            yield ReplayedFrame(record, frame, frame.percentage, frame.status)
+        else:
+            yield ReplayedFrame(
+                record,
+                frame,
+                battery_profile.percentage(frame.centivolts),
+                battery_profile.status(frame.centivolts)
+            )
+
+
+def _pack_address(address: str) -> bytes:
+    try:
+        packed = bytes.fromhex(address.replace(":", ""))
+    except ValueError:
+        packed = b""
+    return packed if len(packed) == 6 else bytes(6)
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from typing import Any
 
-from .bmx_ble import BMxBluetoothDeviceData as DeviceData
+from .models import DEVICE_TYPES, LOCAL_NAME_TO_MODEL, MANUFACTURER_TO_MODEL, Models
 import voluptuous as vol
 
 from homeassistant.components.bluetooth import (
@@ -18,15 +18,37 @@ from homeassistant.core import callback
 
 from .const import (
     DOMAIN,
+    CONF_SHOW_ALL,
     SCAN_MODES,
     CONF_SCAN_MODE,
     DEFAULT_SCAN_MODE,
+    CONNECTION_MODES,
+    CONF_CONNECTION_MODE,
+    DEFAULT_CONNECTION_MODE,
+    CONF_ADVERTISEMENT_POLL_INTERVAL,
+    DEFAULT_ADVERTISEMENT_POLL_INTERVAL,
+    CONF_CAPTURE_FRAMES,
+    DEFAULT_CAPTURE_FRAMES,
+    CONF_VOLTAGE_DEADBAND,
+    DEFAULT_VOLTAGE_DEADBAND,
+    CONF_PUBLISH_MAX_AGE,
+    DEFAULT_PUBLISH_MAX_AGE,
+    CONF_HOURLY_STATISTICS,
+    DEFAULT_HOURLY_STATISTICS,
+    CONF_RECORD_EVERY_READING,
+    DEFAULT_RECORD_EVERY_READING,
+    CONF_HIGH_RATE_WINDOW,
+    DEFAULT_HIGH_RATE_WINDOW,
+    HIGH_RATE_MAX_WINDOW,
+    CONF_ADAPTIVE_MIN_INTERVAL,
+    DEFAULT_ADAPTIVE_MIN_INTERVAL,
+    CONF_ADAPTIVE_MAX_INTERVAL,
+    DEFAULT_ADAPTIVE_MAX_INTERVAL,
     DEFAULT_SCAN_INTERVAL,
     MIN_SCAN_INTERVAL,
     BATTERY_TYPES,
     CONF_BATTERY_TYPE,
     DEFAULT_BATTERY_TYPE,
-    BM_NAMES,
     CONF_CUSTOM_BATTERY_CHEMISTRY,
     DEFAULT_CUSTOM_BATTERY_CHEMISTRY,
     CONF_CUSTOM_CRITICAL_VOLTAGE,
@@ -63,8 +85,9 @@ class BMxConfigFlow(ConfigFlow, domain=DOMAIN):
     def __init__(self) -> None:
         """Initialize the config flow."""
         self._discovery_info: BluetoothServiceInfoBleak | None = None
-        self._discovered_device: DeviceData | None = None
+        self._discovered_model: Models | None = None
         self._discovered_devices: dict[str, str] = {}
+        self._show_all = False
 
     async def async_step_bluetooth(
         self, discovery_info: BluetoothServiceInfoBleak
@@ -72,13 +95,13 @@ class BMxConfigFlow(ConfigFlow, domain=DOMAIN):
         """Handle the bluetooth discovery step."""
         await self.async_set_unique_id(discovery_info.address)
         self._abort_if_unique_id_configured()
-        device = DeviceData()
-        
-        if not discovery_info.name in BM_NAMES:
+        model = LOCAL_NAME_TO_MODEL.get(discovery_info.name)
+
+        if model is None:
             return self.async_abort(reason="not_supported")
 
         self._discovery_info = discovery_info
-        self._discovered_device = device
+        self._discovered_model = model
         return await self.async_step_bluetooth_confirm()
 
     async def async_step_bluetooth_confirm(
@@ -86,11 +109,11 @@ class BMxConfigFlow(ConfigFlow, domain=DOMAIN):
     ) -> ConfigFlowResult:
         """Confirm discovery."""
 
-        assert self._discovered_device is not None
-        device = self._discovered_device
+        assert self._discovered_model is not None
+        model = self._discovered_model
         assert self._discovery_info is not None
         discovery_info = self._discovery_info
-        title = "BM2 battery monitor (" + short_address(discovery_info.address) + ")"
+        title = DEVICE_TYPES[model].device_type + " (" + short_address(discovery_info.address) + ")"
         
         if user_input is not None:
             return self.async_create_entry(title=title, data=user_input)
@@ -115,37 +138,27 @@ class BMxConfigFlow(ConfigFlow, domain=DOMAIN):
         """Handle the user step to pick discovered device."""
 
         if user_input is not None:
-            address = user_input[CONF_ADDRESS]
-            await self.async_set_unique_id(address, raise_on_progress=False)
-            self._abort_if_unique_id_configured()
-            return self.async_create_entry(
-                title=self._discovered_devices[address], data=user_input
-            )
-
-        current_addresses = self._async_current_ids(include_ignore=False)
-        for discovery_info in async_discovered_service_info(self.hass, False):
-            address = discovery_info.address
-            if address in current_addresses or address in self._discovered_devices:
-                continue
-            device = DeviceData()
-
-            if discovery_info.name in BM_NAMES:
-                self._discovered_devices[address] = (
-                    f"BM2 battery monitor ({short_address(discovery_info.address)})"
-                )
-            else:
-                # Add it anyway in case the monitor hasn't been discovered for some reason
-                self._discovered_devices[address] = (
-                    f"{discovery_info.name} ({discovery_info.address})"
+            show_all = user_input.get(CONF_SHOW_ALL, False)
+            if show_all == self._show_all:
+                # A device has been picked, rather than the list being switched between likely and all devices
+                address = user_input[CONF_ADDRESS]
+                await self.async_set_unique_id(address, raise_on_progress=False)
+                self._abort_if_unique_id_configured()
+                return self.async_create_entry(
+                    title=self._discovered_devices[address],
+                    data={CONF_ADDRESS: address, CONF_BATTERY_TYPE: user_input[CONF_BATTERY_TYPE]}
                 )
+            self._show_all = show_all
 
+        self._discovered_devices = self._async_discover_devices()
         if not self._discovered_devices:
             return self.async_abort(reason="no_devices_found")
 
         data_schema=vol.Schema(
                 {
                     vol.Required(CONF_ADDRESS): vol.In(self._discovered_devices),
-                    vol.Required(CONF_BATTERY_TYPE, default = DEFAULT_BATTERY_TYPE): vol.In(BATTERY_TYPES)
+                    vol.Required(CONF_BATTERY_TYPE, default = DEFAULT_BATTERY_TYPE): vol.In(BATTERY_TYPES),
+                    vol.Optional(CONF_SHOW_ALL, default = self._show_all): bool
                 }
             )
 
@@ -153,6 +166,37 @@ class BMxConfigFlow(ConfigFlow, domain=DOMAIN):
             step_id="user", data_schema=data_schema
         )
 
+    @callback
+    def _async_discover_devices(self) -> dict[str, str]:
+        """ Titles of the devices that could be added, keyed by address, in the order to list them
+            Devices advertising a known monitor name come first, then those with a monitor's manufacturer data
+            (which is shared with plenty of other devices), each strongest signal first.  Anything else is only
+            listed if asked for, or if there's nothing more likely """
+
+        current_addresses = self._async_current_ids(include_ignore=False)
+        candidates: dict[str, tuple[int, int, str]] = {}
+        for discovery_info in async_discovered_service_info(self.hass, False):
+            address = discovery_info.address
+            if address in current_addresses:
+                continue
+
+            if (model := LOCAL_NAME_TO_MODEL.get(discovery_info.name)) is not None:
+                likelihood = 0
+                title = f"{DEVICE_TYPES[model].device_type} ({short_address(address)})"
+            else:
+                likelihood = 1 if not MANUFACTURER_TO_MODEL.keys().isdisjoint(discovery_info.manufacturer_data) else 2
+                title = f"{discovery_info.name} ({address})"
+
+            # The same device can be heard by more than one adapter or proxy, so keep the best sighting
+            candidate = (likelihood, -discovery_info.rssi, title)
+            if address not in candidates or candidate < candidates[address]:
+                candidates[address] = candidate
+
+        if not self._show_all and any(likelihood < 2 for likelihood, _, _ in candidates.values()):
+            candidates = {address: candidate for address, candidate in candidates.items() if candidate[0] < 2}
+
+        return {address: title for address, (_, _, title) in sorted(candidates.items(), key=lambda item: item[1])}
+
 class BMxOptionsFlow(OptionsFlow):
     """Handles the options flow."""
 
@@ -174,6 +218,10 @@ class BMxOptionsFlow(OptionsFlow):
 
         data_schema = vol.Schema(
             {
+                vol.Required(
+                    CONF_CONNECTION_MODE,
+                    default=self.config_entry.data.get(CONF_CONNECTION_MODE, DEFAULT_CONNECTION_MODE),
+                ): vol.In(CONNECTION_MODES),
                 vol.Required(
                     CONF_SCAN_MODE,
                     default=self.config_entry.data.get(CONF_SCAN_MODE, DEFAULT_SCAN_MODE),
@@ -182,10 +230,46 @@ class BMxOptionsFlow(OptionsFlow):
                     CONF_SCAN_INTERVAL,
                     default=self.config_entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
                 ): (vol.All(vol.Coerce(int), vol.Clamp(min=MIN_SCAN_INTERVAL))),
+                vol.Required(
+                    CONF_ADAPTIVE_MIN_INTERVAL,
+                    default=self.config_entry.data.get(CONF_ADAPTIVE_MIN_INTERVAL, DEFAULT_ADAPTIVE_MIN_INTERVAL),
+                ): (vol.All(vol.Coerce(int), vol.Clamp(min=MIN_SCAN_INTERVAL))),
+                vol.Required(
+                    CONF_ADAPTIVE_MAX_INTERVAL,
+                    default=self.config_entry.data.get(CONF_ADAPTIVE_MAX_INTERVAL, DEFAULT_ADAPTIVE_MAX_INTERVAL),
+                ): (vol.All(vol.Coerce(int), vol.Clamp(min=MIN_SCAN_INTERVAL))),
+                vol.Required(
+                    CONF_ADVERTISEMENT_POLL_INTERVAL,
+                    default=self.config_entry.data.get(CONF_ADVERTISEMENT_POLL_INTERVAL, DEFAULT_ADVERTISEMENT_POLL_INTERVAL),
+                ): (vol.All(vol.Coerce(int), vol.Range(min=0))),
+                vol.Required(
+                    CONF_VOLTAGE_DEADBAND,
+                    default=self.config_entry.data.get(CONF_VOLTAGE_DEADBAND, DEFAULT_VOLTAGE_DEADBAND),
+                ): (vol.All(vol.Coerce(float), vol.Range(min=0))),
+                vol.Required(
+                    CONF_PUBLISH_MAX_AGE,
+                    default=self.config_entry.data.get(CONF_PUBLISH_MAX_AGE, DEFAULT_PUBLISH_MAX_AGE),
+                ): (vol.All(vol.Coerce(int), vol.Range(min=0))),
+                vol.Required(
+                    CONF_HIGH_RATE_WINDOW,
+                    default=self.config_entry.data.get(CONF_HIGH_RATE_WINDOW, DEFAULT_HIGH_RATE_WINDOW),
+                ): (vol.All(vol.Coerce(int), vol.Clamp(min=0, max=HIGH_RATE_MAX_WINDOW))),
+                vol.Required(
+                    CONF_HOURLY_STATISTICS,
+                    default=self.config_entry.data.get(CONF_HOURLY_STATISTICS, DEFAULT_HOURLY_STATISTICS),
+                ): bool,
+                vol.Required(
+                    CONF_RECORD_EVERY_READING,
+                    default=self.config_entry.data.get(CONF_RECORD_EVERY_READING, DEFAULT_RECORD_EVERY_READING),
+                ): bool,
                 vol.Required(
                     CONF_BATTERY_TYPE,
                     default=self.config_entry.data.get(CONF_BATTERY_TYPE, DEFAULT_BATTERY_TYPE),
                 ): vol.In(BATTERY_TYPES),
+                vol.Required(
+                    CONF_CAPTURE_FRAMES,
+                    default=self.config_entry.data.get(CONF_CAPTURE_FRAMES, DEFAULT_CAPTURE_FRAMES),
+                ): bool,
             }
         )
 
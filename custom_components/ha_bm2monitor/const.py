@@ -2,12 +2,40 @@
 
 DOMAIN = "ha_bm2monitor"
 
+SERVICE_REQUEST_POLL = "request_poll"
+
+# Where each device's unpublished hourly statistics are saved, so restarts and reloads don't lose the hour so far
+HOURLY_STORAGE_VERSION = 1
+HOURLY_STORAGE_KEY = f"{DOMAIN}.hourly"
+HOURLY_SAVE_DELAY = 10
+
+CONF_SHOW_ALL = "show_all"
 CONF_BATTERY_TYPE = "battery_type"
 DEFAULT_BATTERY_TYPE = "Automatic (via BM2)"
 DEFAULT_SCAN_INTERVAL = 60
 MIN_SCAN_INTERVAL = 30
 CONF_SCAN_MODE = "scan_mode"
 DEFAULT_SCAN_MODE = "Never rate limit sensor updates"
+CONF_ADAPTIVE_MIN_INTERVAL = "adaptive_min_interval"
+DEFAULT_ADAPTIVE_MIN_INTERVAL = 30
+CONF_ADAPTIVE_MAX_INTERVAL = "adaptive_max_interval"
+DEFAULT_ADAPTIVE_MAX_INTERVAL = 900
+CONF_CAPTURE_FRAMES = "capture_frames"
+DEFAULT_CAPTURE_FRAMES = False
+CONF_CONNECTION_MODE = "connection_mode"
+DEFAULT_CONNECTION_MODE = "Connect for each update"
+CONF_ADVERTISEMENT_POLL_INTERVAL = "advertisement_poll_interval"
+DEFAULT_ADVERTISEMENT_POLL_INTERVAL = 3600
+CONF_VOLTAGE_DEADBAND = "voltage_deadband"
+DEFAULT_VOLTAGE_DEADBAND = 0.02
+CONF_PUBLISH_MAX_AGE = "publish_max_age"
+DEFAULT_PUBLISH_MAX_AGE = 900
+CONF_HOURLY_STATISTICS = "hourly_statistics"
+DEFAULT_HOURLY_STATISTICS = True
+CONF_RECORD_EVERY_READING = "record_every_reading"
+DEFAULT_RECORD_EVERY_READING = True
+CONF_HIGH_RATE_WINDOW = "high_rate_window"
+DEFAULT_HIGH_RATE_WINDOW = 0
 
 CONF_CUSTOM_BATTERY_CHEMISTRY = "custom_battery_chemistry"
 DEFAULT_CUSTOM_BATTERY_CHEMISTRY = "Custom battery"
@@ -30,17 +58,87 @@ DEFAULT_CUSTOM_NUMPY_PERCENT = [0, 20, 50, 100]
 
 GATT_TIMEOUT = 20
 
-BM_NAMES = [
+# In the adaptive scan mode, the voltage is considered to be changing (so the battery is under load or
+# charging) when it moves by more than ADAPTIVE_NOISE_CENTIVOLTS and at ADAPTIVE_ACTIVE_RATE volts/hour or more
+ADAPTIVE_NOISE_CENTIVOLTS = 1
+ADAPTIVE_ACTIVE_RATE = 0.1
+
+# Each device keeps a fixed-size voltage history, taking at most one sample every HISTORY_SAMPLE_SPACING
+# seconds - so the capacity covers the longest trend window (both in seconds)
+HISTORY_SAMPLE_SPACING = 5
+HISTORY_CAPACITY = 720
+TREND_SHORT_WINDOW = 300
+TREND_LONG_WINDOW = 3600
+
+# Smallest change in the voltage trends (volts/hour) and time to critical (hours) that's published - smaller
+# changes are held back until the max-age heartbeat, the same as the voltage deadband option
+TREND_DEADBAND = 0.01
+TIME_TO_CRITICAL_DEADBAND = 0.5
+
+# How often (in seconds) each device's completed hours of voltage and percentage statistics are handed to the
+# recorder, and how many completed hours are held on to if the recorder isn't running
+STATISTICS_PUBLISH_INTERVAL = 300
+STATISTICS_HOURS_KEPT = 48
+
+# Longest high-rate window (in seconds) - a poll holds its place on the adapter or proxy for the whole window
+HIGH_RATE_MAX_WINDOW = 120
+
+# Number of recent poll timings kept per device for the diagnostic sensors
+METRICS_WINDOW = 100
+
+# How often (in seconds) captured frames are written out to the capture file
+CAPTURE_FLUSH_INTERVAL = 30
+
+# Connections allowed in flight at once on each adapter or proxy, across every BM2 config entry - including
+# the ones held open by monitors that stay connected
+MAX_CONNECTIONS_PER_ADAPTER = 2
+
+# Longest (in seconds) a poll or streaming connection waits for a connection slot before giving up until next time
+SLOT_WAIT_TIMEOUT = 60
+
+# How far (in seconds) charging or critical batteries are moved up the connection queue
+URGENT_POLL_HEAD_START = 120
+
+# After BREAKER_THRESHOLD consecutive failed polls of a device, further polls are held off for BREAKER_BASE_DELAY
+# seconds, doubling with each further failure up to BREAKER_MAX_DELAY - unless the device comes back into range
+# with an RSSI of at least BREAKER_REOPEN_RSSI
+BREAKER_THRESHOLD = 2
+BREAKER_BASE_DELAY = 60
+BREAKER_MAX_DELAY = 3600
+BREAKER_REOPEN_RSSI = -80
+
+# Delays (in seconds) between reconnection attempts when staying connected
+STREAM_RECONNECT_MIN_DELAY = 5
+STREAM_RECONNECT_MAX_DELAY = 300
+
+# How long (in seconds) a held connection can go without a notification before it's dropped and reconnected -
+# the BM2 sends one about every second
+STREAM_STALE_TIMEOUT = 60
+
+BM2_NAMES = [
     "Battery Monitor",
     "Li Battery Monitor",
     "ZX-1689"
 ]
 
+BM6_NAMES = [
+    "BM6"
+]
+
+BM_NAMES = BM2_NAMES + BM6_NAMES
+
 
 SCAN_MODES = [
 #    "Always rate limit sensor updates",
     "Never rate limit sensor updates",
-    "Only rate limit when not charging"
+    "Only rate limit when not charging",
+    "Adaptive (poll faster while the voltage is changing)"
+]
+
+CONNECTION_MODES = [
+    "Connect for each update",
+    "Stay connected",
+    "Advertisements only (never connect)"
 ]
 
 
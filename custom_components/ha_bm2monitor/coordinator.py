@@ -0,0 +1,54 @@
+"""Coordinator for the BM2 battery monitor integration."""
+
+from __future__ import annotations
+
+import logging
+
+from .bmx_ble import BMxBluetoothDeviceData, SensorUpdate
+
+from homeassistant.components.bluetooth import async_address_present
+from homeassistant.components.bluetooth.active_update_processor import (
+    ActiveBluetoothProcessorCoordinator
+)
+from homeassistant.core import HomeAssistant, callback
+
+
+class BMxActiveBluetoothProcessorCoordinator(
+    ActiveBluetoothProcessorCoordinator[SensorUpdate]
+    ):
+    """Active coordinator that also accepts updates pushed from a held connection."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        logger: logging.Logger,
+        *,
+        device_data: BMxBluetoothDeviceData,
+        **kwargs,
+    ) -> None:
+        """Initialize the coordinator, keeping hold of the device data it polls."""
+        super().__init__(hass, logger, **kwargs)
+        self.device_data = device_data
+
+    @callback
+    def async_push_update(self, update: SensorUpdate) -> None:
+        """Push an update that arrived outside of the advertisement/poll cycle."""
+
+        # A live connection proves the device is there, even though most devices stop advertising while connected.
+        # Availability otherwise only follows advertisements (there's no public way of setting it), and once the
+        # device has been marked unavailable it isn't tracked again until it next advertises - so it's set directly
+        # here, and async_stream_lost sets it back when the connection goes
+        self._available = True
+
+        for processor in self._processors:
+            processor.async_handle_update(update)
+
+    @callback
+    def async_stream_lost(self) -> None:
+        """ The held connection has dropped or gone quiet, so the device is no longer available on the strength
+            of it - unless it's advertising, in which case Home Assistant's own tracking takes over again """
+
+        if self._available and not async_address_present(self.hass, self.address, self.connectable):
+            self._available = False
+            for processor in self._processors:
+                processor.async_handle_unavailable()
@@ -0,0 +1,24 @@
+"""Diagnostics support for the BM2 battery monitor integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from . import BMxConfigEntry
+from .const import DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: BMxConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    device_data = entry.runtime_data.device_data
+    hub = hass.data[DOMAIN]
+    return {
+        "entry_data": dict(entry.data),
+        "poll_metrics": device_data.metrics.as_dict(),
+        "circuit_breaker": device_data.breaker.as_dict(),
+        "fleet": hub.fleet_metrics(),
+    }
@@ -0,0 +1,121 @@
+"""In-memory voltage history for the BM2 battery monitor integration."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable
+
+
+class _SlopeWindow:
+    """Running least-squares sums over the samples from the last few seconds"""
+
+    __slots__ = ("seconds", "head", "n", "sum_t", "sum_v", "sum_tt", "sum_tv")
+
+    def __init__(self, seconds: float, head: int) -> None:
+        self.seconds = seconds
+        self.head = head    # Sequence number of the oldest sample in the window
+        self.n = 0
+        self.sum_t = 0.0
+        self.sum_v = 0.0
+        self.sum_tt = 0.0
+        self.sum_tv = 0.0
+
+    def add(self, t: float, v: float) -> None:
+        self.n += 1
+        self.sum_t += t
+        self.sum_v += v
+        self.sum_tt += t * t
+        self.sum_tv += t * v
+
+    def remove(self, t: float, v: float) -> None:
+        self.head += 1
+        self.n -= 1
+        self.sum_t -= t
+        self.sum_v -= v
+        self.sum_tt -= t * t
+        self.sum_tv -= t * v
+
+    def slope(self) -> float | None:
+        """Least-squares slope in volts per second, or None if there isn't enough to go on"""
+        if self.n < 2:
+            return None
+        denominator = self.n * self.sum_tt - self.sum_t * self.sum_t
+        if denominator <= 0:
+            return None
+        return (self.n * self.sum_tv - self.sum_t * self.sum_v) / denominator
+
+
+class VoltageHistory:
+    """ Fixed-size ring buffer of timestamped voltage and percentage samples
+        Memory use is fixed by the capacity, and the trend over each window is kept up to date
+        as samples are added, rather than being recalculated from scratch when it's needed """
+
+    def __init__(self, capacity: int, windows: Iterable[float]) -> None:
+        self._capacity = capacity
+        self._times = array("d", [0.0]) * capacity
+        self._centivolts = array("H", [0]) * capacity
+        self._percentages = array("B", [0]) * capacity
+
+        # Sequence number of the next sample, and of the oldest one still held
+        self._next = 0
+        self._oldest = 0
+
+        # Times are held relative to the first sample, to keep the running sums precise
+        self._epoch: float | None = None
+        self._windows = {seconds: _SlopeWindow(seconds, 0) for seconds in windows}
+
+    def __len__(self) -> int:
+        return self._next - self._oldest
+
+    @property
+    def latest(self) -> tuple[float, int, int] | None:
+        """The most recent (timestamp, centivolts, percentage), if there is one"""
+        if self._next == self._oldest:
+            return None
+        index = (self._next - 1) % self._capacity
+        return self._times[index] + self._epoch, self._centivolts[index], self._percentages[index]
+
+    def add(self, timestamp: float, centivolts: int, percentage: int) -> None:
+        """Add a sample, which must be no older than the previous one"""
+        if self._epoch is None:
+            self._epoch = timestamp
+        t = timestamp - self._epoch
+        v = centivolts / 100
+
+        # If the buffer is full the oldest sample is about to be overwritten, so it has to leave every window first
+        if self._next - self._oldest == self._capacity:
+            for window in self._windows.values():
+                if window.head == self._oldest:
+                    window.remove(*self._sample(self._oldest))
+            self._oldest += 1
+
+        index = self._next % self._capacity
+        self._times[index] = t
+        self._centivolts[index] = centivolts
+        self._percentages[index] = percentage
+        self._next += 1
+
+        for window in self._windows.values():
+            window.add(t, v)
+            while window.head < self._next and self._times[window.head % self._capacity] < t - window.seconds:
+                window.remove(*self._sample(window.head))
+
+        # Adding and removing accumulates rounding errors, so rebuild the sums exactly once per lap of the buffer
+        if self._next % self._capacity == 0:
+            self._rebuild_windows()
+
+    def slope(self, window: float) -> float | None:
+        """The voltage trend over one of the windows, in volts per hour"""
+        slope = self._windows[window].slope()
+        return None if slope is None else slope * 3600
+
+    def _sample(self, sequence: int) -> tuple[float, float]:
+        index = sequence % self._capacity
+        return self._times[index], self._centivolts[index] / 100
+
+    def _rebuild_windows(self) -> None:
+        for seconds, window in self._windows.items():
+            rebuilt = _SlopeWindow(seconds, window.head)
+            for sequence in range(window.head, self._next):
+                rebuilt.add(*self._sample(sequence))
+            self._windows[seconds] = rebuilt
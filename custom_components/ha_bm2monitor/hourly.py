@@ -0,0 +1,88 @@
+"""Hourly statistics aggregation for the BM2 battery monitor integration."""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from collections.abc import Mapping
+from typing import Any, NamedTuple
+
+HOUR = 3600
+
+
+class HourSummary(NamedTuple):
+    """The mean, minimum and maximum of a measurement over one clock hour"""
+
+    start: float    # Epoch seconds, on the hour
+    mean: float
+    minimum: float
+    maximum: float
+    count: int
+
+
+class HourlyStatistics:
+    """ Running mean, minimum and maximum of a measurement for the current clock hour, in constant time and
+        space per sample.  Each hour is summarised as soon as a sample from a later hour arrives, and queued
+        (up to keep of them) until it's taken for publishing """
+
+    __slots__ = ("_hour", "_count", "_total", "_minimum", "_maximum", "_completed")
+
+    def __init__(self, keep: int) -> None:
+        self._hour: float | None = None
+        self._count = 0
+        self._total = 0.0
+        self._minimum = math.inf
+        self._maximum = -math.inf
+        self._completed: deque[HourSummary] = deque(maxlen=keep)
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Add a sample taken at timestamp (epoch seconds)"""
+
+        hour = timestamp - timestamp % HOUR
+        if hour != self._hour:
+            if self._count:
+                self._completed.append(self._summary())
+            self._hour = hour
+            self._count = 0
+            self._total = 0.0
+            self._minimum = math.inf
+            self._maximum = -math.inf
+
+        self._count += 1
+        self._total += value
+        if value < self._minimum:
+            self._minimum = value
+        if value > self._maximum:
+            self._maximum = value
+
+    def take(self) -> list[HourSummary]:
+        """Return the completed hours not yet taken, oldest first"""
+        completed = list(self._completed)
+        self._completed.clear()
+        return completed
+
+    def as_dict(self) -> dict[str, Any]:
+        """The hour so far and the completed hours not yet taken, so they can be saved across restarts"""
+        return {
+            "hour": self._hour,
+            "count": self._count,
+            "total": self._total,
+            "minimum": self._minimum if self._count else None,
+            "maximum": self._maximum if self._count else None,
+            "completed": [list(hour) for hour in self._completed],
+        }
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """ Pick up where as_dict left off, before any samples have been added
+            If the saved hour is over by the time the next sample arrives, it's completed then as usual """
+
+        self._completed.extend(HourSummary(*hour) for hour in data["completed"])
+        if data["count"]:
+            self._hour = data["hour"]
+            self._count = data["count"]
+            self._total = data["total"]
+            self._minimum = data["minimum"]
+            self._maximum = data["maximum"]
+
+    def _summary(self) -> HourSummary:
+        return HourSummary(self._hour, self._total / self._count, self._minimum, self._maximum, self._count)
@@ -0,0 +1,240 @@
+"""Integration-wide hub for the BM2 battery monitor integration."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import sys
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from contextlib import AbstractAsyncContextManager
+from typing import Any
+
+from bleak import BleakError, BLEDevice
+
+from homeassistant.components.bluetooth import (
+    BluetoothServiceInfoBleak,
+    async_ble_device_from_address,
+    async_scanner_devices_by_address,
+)
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, PERCENTAGE, UnitOfElectricPotential
+from homeassistant.core import CoreState, Event, HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .bmx_ble import BMxBluetoothDeviceData, SensorUpdate
+from .breaker import BREAKER_CLOSED
+from .const import (
+    DOMAIN,
+    CONF_BATTERY_TYPE,
+    DEFAULT_BATTERY_TYPE,
+    CONF_HOURLY_STATISTICS,
+    DEFAULT_HOURLY_STATISTICS,
+    MAX_CONNECTIONS_PER_ADAPTER,
+    URGENT_POLL_HEAD_START,
+    SLOT_WAIT_TIMEOUT,
+    HOURLY_STORAGE_VERSION,
+    HOURLY_STORAGE_KEY,
+    HOURLY_SAVE_DELAY
+)
+from .scheduler import BMxConnectionScheduler, SlotUnavailableError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _import_modules(names: list[str]) -> None:
+    for name in names:
+        importlib.import_module(name)
+
+
+class BMxHub:
+    """ One per Home Assistant instance, kept in hass.data[DOMAIN]
+        Owns the state of every monitor, keyed by address, along with everything they share - the connection
+        scheduler and the saved hourly statistics - and does the polling for all of them, so each config
+        entry just registers its device and hands the hub's methods to its coordinator """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self.scheduler = BMxConnectionScheduler(MAX_CONNECTIONS_PER_ADAPTER, URGENT_POLL_HEAD_START)
+        self.devices: dict[str, BMxBluetoothDeviceData] = {}
+
+        # Hourly statistics not yet published (including the hour so far) for devices that aren't loaded, by address,
+        # along with where they're all saved so they survive restarts and reloads
+        self._hourly_store: Store[dict[str, Any]] = Store(hass, HOURLY_STORAGE_VERSION, HOURLY_STORAGE_KEY)
+        self._hourly_saved: dict[str, Any] = {}
+
+    async def async_load(self) -> None:
+        """Load anything saved last time, before any devices are added"""
+        if (stored := await self._hourly_store.async_load()) is not None:
+            self._hourly_saved = stored
+
+        # Config entries aren't unloaded when Home Assistant stops, so save the hour so far for every device then
+        self._hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._save_hourly)
+
+    async def async_import_requirements(self, entrydata: Mapping[str, Any]) -> None:
+        """ Import what a device with these options will need, in the executor, before it's first used
+            pycryptodome (for every device) and numpy (for a battery chemistry) are only imported when they're
+            needed, to keep loading the integration quick, and importing them on the event loop would block it.
+            Once they're imported, the imports where they're used just look them up """
+
+        names = ["Crypto.Cipher.AES"]
+        if entrydata.get(CONF_BATTERY_TYPE, DEFAULT_BATTERY_TYPE) != "Automatic (via BM2)":
+            names.append("numpy")
+        if missing := [name for name in names if name not in sys.modules]:
+            await self._hass.async_add_executor_job(_import_modules, missing)
+
+    def add_device(self, address: str, entrydata: Mapping[str, Any]) -> BMxBluetoothDeviceData:
+        """Start looking after a device, carrying on with any hourly statistics saved for it"""
+        device_data = BMxBluetoothDeviceData()
+        device_data.set_entry_data(entrydata)
+        if (hourly := self._hourly_saved.pop(address, None)) is not None:
+            device_data.restore_hourly_state(hourly)
+        self.devices[address] = device_data
+        return device_data
+
+    def remove_device(self, address: str) -> None:
+        """Stop looking after a device, saving its hourly statistics for when it's added again"""
+        if (device_data := self.devices.pop(address, None)) is not None:
+            self._hourly_saved[address] = device_data.hourly_state()
+            self._save_hourly()
+
+    def forget_device(self, address: str) -> None:
+        """Drop everything saved for a device whose config entry has been deleted"""
+        if self._hourly_saved.pop(address, None) is not None:
+            self._save_hourly()
+
+    @callback
+    def _save_hourly(self, event: Event | None = None) -> None:
+        self._hourly_store.async_delay_save(self._hourly_to_save, HOURLY_SAVE_DELAY)
+
+    def _hourly_to_save(self) -> dict[str, Any]:
+        return self._hourly_saved | {
+            address: device_data.hourly_state() for address, device_data in self.devices.items()
+        }
+
+    def connection_source(self, address: str) -> str:
+        """ The adapter or proxy a connection to a device is expected to go through, so it can wait its turn there
+            This is only a best guess - Home Assistant's Bluetooth client picks the adapter or proxy itself when it
+            connects (by signal strength, recent failures and free connection slots), and there's no supported way
+            of asking it to use a particular one, so the strongest signal is taken as the one it'll pick """
+
+        sources = async_scanner_devices_by_address(self._hass, address, connectable=True)
+        if not sources:
+            return address
+        return max(sources, key=lambda source: source.advertisement.rssi).scanner.source
+
+    def needs_poll(
+        self, address: str, service_info: BluetoothServiceInfoBleak, last_poll: float | None
+    ) -> bool:
+        """ Only poll if hass is running, we actually have a way to connect to the device, and we need to poll
+            poll_needed goes last, as it uses up a requested poll or the circuit breaker's early retry - which
+            would be lost if there was then no way of connecting """
+        return (
+            self._hass.state is CoreState.running
+            and bool(
+                async_ble_device_from_address(
+                    self._hass, service_info.device.address, connectable=True
+                )
+            )
+            and self.devices[address].poll_needed(service_info, last_poll)
+        )
+
+    async def async_poll(self, address: str, service_info: BluetoothServiceInfoBleak) -> SensorUpdate:
+        """Poll a device, once it's had its turn on the adapter or proxy it's expected to connect through"""
+
+        device_data = self.devices[address]
+        if not (ble_device := self.best_ble_device(address)):
+            # We have no bluetooth controller that is in range of
+            # the device to poll it
+            raise RuntimeError(
+                f"No connectable device found for {service_info.device.address}"
+            )
+
+        try:
+            async with self.scheduler.async_slot(
+                self.connection_source(address), device_data.urgent, SLOT_WAIT_TIMEOUT
+            ):
+                return await device_data.async_poll(ble_device)
+        except SlotUnavailableError:
+            # The adapter or proxy was too busy, which says nothing about the device
+            raise
+        except (BleakError, asyncio.TimeoutError):
+            # Counts towards opening the device's circuit breaker
+            device_data.record_poll_failure()
+            raise
+
+    def best_ble_device(self, address: str) -> BLEDevice | None:
+        """Used when staying connected too - Home Assistant's Bluetooth client chooses which adapter or proxy to connect through"""
+        return async_ble_device_from_address(self._hass, address, connectable=True)
+
+    def connection_slot(self, address: str) -> AbstractAsyncContextManager[None]:
+        """ Used when staying connected, so reconnections queue up alongside everyone else's polls, and the
+            connection counts against the adapter or proxy's limit for as long as it's held open - though streams
+            can never take its last slot, which is kept for polls """
+        return self.scheduler.async_slot(
+            self.connection_source(address), self.devices[address].urgent, SLOT_WAIT_TIMEOUT, stream=True
+        )
+
+    @callback
+    def publish_statistics(self, address: str, name: str, now: datetime | None = None) -> None:
+        """ Hand a device's completed hours of voltage and percentage statistics to the recorder, as external
+            statistics - they cover every reading, even those the sensors weren't updated with
+            Hours completed while the recorder isn't running are held on to until it is, and everything not yet
+            published is saved every time, so at most one interval's readings are lost if Home Assistant crashes """
+
+        self._save_hourly()
+        device_data = self.devices.get(address)
+        if (
+            device_data is None
+            or not device_data.entry_data.get(CONF_HOURLY_STATISTICS, DEFAULT_HOURLY_STATISTICS)
+            or "recorder" not in self._hass.config.components
+        ):
+            return
+
+        # The recorder is only imported once it's known to be running
+        from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+        from homeassistant.components.recorder.statistics import async_add_external_statistics
+
+        voltage_hours, percentage_hours = device_data.take_hourly_statistics()
+        object_id = address.replace(":", "").lower()
+
+        for hours, suffix, label, unit in (
+            (voltage_hours, "voltage", "Voltage", UnitOfElectricPotential.VOLT),
+            (percentage_hours, "percent", "Percent", PERCENTAGE),
+        ):
+            if not hours:
+                continue
+
+            _LOGGER.debug("Publishing %s hours of %s statistics for %s", len(hours), suffix, name)
+            async_add_external_statistics(
+                self._hass,
+                StatisticMetaData(
+                    has_mean = True,
+                    has_sum = False,
+                    name = f"{name} {label}",
+                    source = DOMAIN,
+                    statistic_id = f"{DOMAIN}:{object_id}_{suffix}",
+                    unit_of_measurement = unit,
+                ),
+                [
+                    StatisticData(
+                        start = datetime.fromtimestamp(hour.start, tz = timezone.utc),
+                        mean = hour.mean,
+                        min = hour.minimum,
+                        max = hour.maximum,
+                    )
+                    for hour in hours
+                ],
+            )
+
+    def fleet_metrics(self) -> dict[str, Any]:
+        """Poll outcomes across every device, for diagnostics"""
+        devices = self.devices.values()
+        return {
+            "devices": len(self.devices),
+            "successes": sum(device_data.metrics.successes for device_data in devices),
+            "timeouts": sum(device_data.metrics.timeouts for device_data in devices),
+            "errors": sum(device_data.metrics.errors for device_data in devices),
+            "breakers_not_closed": sum(1 for device_data in devices if device_data.breaker.state != BREAKER_CLOSED),
+        }
+
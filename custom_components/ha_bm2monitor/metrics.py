@@ -0,0 +1,61 @@
+"""Poll timing and health metrics for the BM2 battery monitor integration."""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any
+
+# The phases of a poll that are timed
+PHASE_CONNECT = "connect"
+PHASE_SUBSCRIBE = "subscribe"
+PHASE_GATT_WAIT = "gatt_wait"
+PHASE_DECODE = "decode"
+PHASE_TOTAL = "total"
+
+PHASES = (PHASE_CONNECT, PHASE_SUBSCRIBE, PHASE_GATT_WAIT, PHASE_DECODE, PHASE_TOTAL)
+
+
+class PollMetrics:
+    """ Per-device poll timings and outcome counters
+        Only the most recent few timings of each phase are kept, so memory use is fixed """
+
+    def __init__(self, window: int) -> None:
+        self._timings: dict[str, deque[float]] = {phase: deque(maxlen=window) for phase in PHASES}
+        self.successes = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def record(self, phase: str, seconds: float) -> None:
+        """Record how long a phase took"""
+        self._timings[phase].append(seconds * 1000)
+
+    def last(self, phase: str) -> float | None:
+        """The most recent timing of a phase, in milliseconds"""
+        timings = self._timings[phase]
+        return timings[-1] if timings else None
+
+    def percentile(self, phase: str, percent: float) -> float | None:
+        """A percentile of the recent timings of a phase, in milliseconds"""
+        timings = self._timings[phase]
+        if not timings:
+            return None
+        ordered = sorted(timings)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Everything we know, for diagnostics"""
+        return {
+            "successes": self.successes,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "timings_ms": {
+                phase: {
+                    "last": self.last(phase),
+                    "p50": self.percentile(phase, 50),
+                    "p95": self.percentile(phase, 95),
+                    "max": max(timings) if timings else None,
+                    "samples": len(timings),
+                }
+                for phase, timings in self._timings.items()
+            },
+        }
@@ -0,0 +1,58 @@
+"""Supported models of BMx battery monitor, and how to recognise and talk to each of them.
+
+Kept free of any Bluetooth client or Home Assistant dependencies, so the
+config flow can use it without loading the rest of the integration.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import Enum, auto
+
+from .const import BM2_NAMES, BM6_NAMES
+from .protocol import BMxFrame, bm6_reading_command, decode_bm2_frame, decode_bm6_frame
+
+
+@dataclass
+class ModelDescription:
+    device_type: str
+    local_names: list[str]
+    manufacturer_id: int | None
+    characteristic: str
+    decode: Callable[[bytes], BMxFrame | None]
+    command_characteristic: str | None = None   # Where to write command to ask for a reading, if the model needs asking
+    command: Callable[[], bytes] | None = None
+
+BMx_MANUFACTURER = 0x004C
+
+class Models(Enum):
+    BM2 = auto()
+    BM6 = auto()
+
+DEVICE_TYPES = {
+    Models.BM2: ModelDescription(
+        device_type="BM2 battery monitor",
+        local_names = BM2_NAMES,
+        manufacturer_id = BMx_MANUFACTURER,
+        characteristic = "{0000fff4-0000-1000-8000-00805f9b34fb}",
+        decode = decode_bm2_frame
+    ),
+    Models.BM6: ModelDescription(
+        device_type="BM6 battery monitor",
+        local_names = BM6_NAMES,
+        manufacturer_id = None,
+        characteristic = "0000fff4-0000-1000-8000-00805f9b34fb",
+        decode = decode_bm6_frame,
+        command_characteristic = "0000fff3-0000-1000-8000-00805f9b34fb",
+        command = bm6_reading_command
+    )
+}
+
+# Models are detected from the advertised local name where there is one, or failing that the manufacturer data
+LOCAL_NAME_TO_MODEL = {
+    name: model for model, model_info in DEVICE_TYPES.items() for name in model_info.local_names
+}
+MANUFACTURER_TO_MODEL = {
+    model_info.manufacturer_id: model for model, model_info in DEVICE_TYPES.items() if model_info.manufacturer_id is not None
+}
@@ -0,0 +1,141 @@
+"""Frame decoding for BMx battery monitors (BM2 and BM6).
+
+Kept free of any Bluetooth client or Home Assistant dependencies, so the
+live poll path and offline tools can share it.
+"""
+
+from __future__ import annotations
+
+from functools import cache
+from typing import NamedTuple
+
+# AES key used by the BM2 to encrypt its characteristic payload ("leagend" followed by 0xff 0xfe "1882466")
+BM2_KEY = bytes([108, 101, 97, 103, 101, 110, 100, 255, 254, 49, 56, 56, 50, 52, 54, 54])
+
+# AES key used by the BM6 ("leagend" followed by 0xff 0xfe "0100009")
+BM6_KEY = bytes([108, 101, 97, 103, 101, 110, 100, 255, 254, 48, 49, 48, 48, 48, 48, 57])
+
+AES_BLOCK_SIZE = 16
+
+# The BM6 only sends a reading when asked, and sends other messages too - readings start with this prefix
+BM6_READING_PREFIX = bytes.fromhex("d15507")
+BM6_READING_REQUEST = bytes.fromhex("d1550700000000000000000000000000")
+
+
+@cache
+def _cipher(key: bytes):
+    """ The cipher for a key, created (and pycryptodome imported) the first time it's needed
+        Both models use CBC with an all-zero IV.  A CBC cipher object carries the chaining state from one
+        call to the next so it can't be reused, but an ECB cipher is stateless - and CBC decryption is just
+        ECB decryption XORed with the previous ciphertext block (the zero IV for the first block) """
+
+    from Crypto.Cipher import AES
+
+    return AES.new(key, AES.MODE_ECB)
+
+
+class BMxFrame(NamedTuple):
+    """ Decoded characteristic payload
+        The BM6 doesn't report a status, and only the BM6 reports a temperature """
+
+    centivolts: int
+    status: int | None
+    percentage: int
+    temperature: int | None = None
+
+    @property
+    def voltage(self) -> float:
+        return self.centivolts / 100.0
+
+
+def _decrypt_payload(cipher, payload: bytes | bytearray | memoryview) -> bytes:
+    """Decrypt an encrypted payload (AES-CBC, zero IV) using one of the cached ECB ciphers"""
+
+    length = len(payload)
+    if length == 0 or length % AES_BLOCK_SIZE:
+        raise ValueError(f"Payload must be a whole number of {AES_BLOCK_SIZE} byte blocks, got {length} bytes")
+
+    plaintext = cipher.decrypt(payload)
+    if length == AES_BLOCK_SIZE:
+        # A single block was XORed with the zero IV, so ECB gives us the answer directly
+        return plaintext
+
+    view = memoryview(payload)
+    chained = bytearray(plaintext)
+    for i in range(AES_BLOCK_SIZE, length):
+        chained[i] ^= view[i - AES_BLOCK_SIZE]
+    return bytes(chained)
+
+
+def decrypt_bm2_payload(payload: bytes | bytearray | memoryview) -> bytes:
+    """Decrypt an encrypted BM2 payload"""
+    return _decrypt_payload(_cipher(BM2_KEY), payload)
+
+
+def decrypt_bm6_payload(payload: bytes | bytearray | memoryview) -> bytes:
+    """Decrypt an encrypted BM6 payload"""
+    return _decrypt_payload(_cipher(BM6_KEY), payload)
+
+
+def decode_bm2_frame(payload: bytes | bytearray | memoryview) -> BMxFrame:
+    """ Decode an encrypted BM2 payload
+        The first decrypted bytes are laid out as nibbles: 2 header, 3 voltage (centivolts), 1 status, 2 percentage """
+
+    plaintext = memoryview(decrypt_bm2_payload(payload))
+    return BMxFrame(
+        centivolts = (plaintext[1] << 4) | (plaintext[2] >> 4),
+        status = plaintext[2] & 0x0F,
+        percentage = plaintext[3]
+    )
+
+
+def encode_bm2_frame(centivolts: int, status: int, percentage: int) -> bytes:
+    """ Build an encrypted BM2 payload, as the device itself would send it
+        Only needed by simulators and tests - a single block with a zero IV is just ECB encryption """
+
+    plaintext = bytearray(AES_BLOCK_SIZE)
+    plaintext[0] = 0xF5
+    plaintext[1] = (centivolts >> 4) & 0xFF
+    plaintext[2] = ((centivolts & 0x0F) << 4) | (status & 0x0F)
+    plaintext[3] = percentage & 0xFF
+    return _cipher(BM2_KEY).encrypt(bytes(plaintext))
+
+
+@cache
+def bm6_reading_command() -> bytes:
+    """The encrypted command that asks the BM6 for a reading"""
+    return _cipher(BM6_KEY).encrypt(BM6_READING_REQUEST)
+
+
+def decode_bm6_frame(payload: bytes | bytearray | memoryview) -> BMxFrame | None:
+    """ Decode an encrypted BM6 payload, or return None if it's one of the BM6's other messages
+        Readings are laid out as bytes: 3 prefix, 1 temperature sign (1 is negative), 1 temperature,
+        1 unknown, 1 percentage, then 3 nibbles of voltage (centivolts) starting at the low nibble of byte 7 """
+
+    plaintext = memoryview(decrypt_bm6_payload(payload))
+    if plaintext[:3] != BM6_READING_PREFIX:
+        return None
+
+    temperature = plaintext[4]
+    if plaintext[3] == 1:
+        temperature = -temperature
+
+    return BMxFrame(
+        centivolts = ((plaintext[7] & 0x0F) << 8) | plaintext[8],
+        status = None,
+        percentage = plaintext[6],
+        temperature = temperature
+    )
+
+
+def encode_bm6_frame(centivolts: int, percentage: int, temperature: int) -> bytes:
+    """Build an encrypted BM6 reading, as the device itself would send it - only needed by simulators and tests"""
+
+    plaintext = bytearray(AES_BLOCK_SIZE)
+    plaintext[0:3] = BM6_READING_PREFIX
+    plaintext[3] = 1 if temperature < 0 else 0
+    plaintext[4] = abs(temperature) & 0xFF
+    plaintext[6] = percentage & 0xFF
+    plaintext[7] = (centivolts >> 8) & 0x0F
+    plaintext[8] = centivolts & 0xFF
+    return _cipher(BM6_KEY).encrypt(bytes(plaintext))
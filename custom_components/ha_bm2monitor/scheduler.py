@@ -0,0 +1,107 @@
+"""Connection scheduling for the BM2 battery monitor integration."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SlotUnavailableError(TimeoutError):
+    """No connection slot could be had on an adapter or proxy in time"""
+
+
+class BMxConnectionScheduler:
+    """ Shared across every config entry, limiting how many connections are in flight on each
+        adapter or proxy at once.  Connections that have to wait are queued in the order they
+        asked, except that urgent ones (charging or critical batteries) are moved ahead by
+        urgent_head_start seconds - so they go first, but can never hold a normal poll back
+        for longer than that
+
+        Connections held open by streaming monitors can only ever take all but one of a source's
+        slots, so there's always one left for everyone else's polls """
+
+    def __init__(self, max_connections: int, urgent_head_start: float) -> None:
+        self._max_connections = max_connections
+        self._urgent_head_start = urgent_head_start
+        self._in_flight: dict[str, int] = {}
+        self._streams: dict[str, int] = {}
+        self._waiting: dict[str, list[tuple[float, int, asyncio.Future[None]]]] = {}
+        self._sequence = itertools.count()
+
+    def in_flight(self, source: str) -> int:
+        """Return how many connections are currently in flight on a source"""
+        return self._in_flight.get(source, 0)
+
+    def queued(self, source: str) -> int:
+        """Return how many connections are waiting for a slot on a source"""
+        return sum(1 for _, _, future in self._waiting.get(source, ()) if not future.done())
+
+    def streams(self, source: str) -> int:
+        """Return how many of a source's slots are held by streaming connections"""
+        return self._streams.get(source, 0)
+
+    @asynccontextmanager
+    async def async_slot(
+        self, source: str, urgent: bool = False, timeout: float | None = None, stream: bool = False
+    ) -> AsyncIterator[None]:
+        """ Hold one of the source's connection slots for the duration of the block
+            Raises SlotUnavailableError if there isn't one within timeout seconds, or straight away for a
+            stream if the streams already hold all the slots they're allowed """
+
+        if stream:
+            if self.streams(source) >= self._max_connections - 1:
+                raise SlotUnavailableError(f"Every connection slot streams can use on {source} is taken")
+            # Counted before waiting, so two streams can't both queue up for the last slot they're allowed
+            self._streams[source] = self.streams(source) + 1
+
+        try:
+            await self._async_acquire(source, urgent, timeout)
+            try:
+                yield
+            finally:
+                self._release(source)
+        finally:
+            if stream:
+                self._streams[source] -= 1
+
+    async def _async_acquire(self, source: str, urgent: bool, timeout: float | None) -> None:
+        # Slots are handed straight from one holder to the next waiter, so if there's
+        # a free slot there can't be anyone still waiting for it
+        in_flight = self._in_flight.get(source, 0)
+        if in_flight < self._max_connections:
+            self._in_flight[source] = in_flight + 1
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        priority = time.monotonic() - (self._urgent_head_start if urgent else 0)
+        heapq.heappush(self._waiting.setdefault(source, []), (priority, next(self._sequence), future))
+        _LOGGER.debug("Waiting for a connection slot on %s (urgent = %s, %s in flight)", source, urgent, in_flight)
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise SlotUnavailableError(f"No connection slot on {source} within {timeout} seconds") from None
+        except asyncio.CancelledError:
+            # If the slot was handed to us just as we were cancelled, pass it on to the next waiter
+            if future.done() and not future.cancelled():
+                self._release(source)
+            raise
+
+    def _release(self, source: str) -> None:
+        waiting = self._waiting.get(source)
+
+        # Hand the slot straight over, skipping any waiters that have since been cancelled
+        while waiting:
+            _, _, future = heapq.heappop(waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+
+        self._in_flight[source] -= 1
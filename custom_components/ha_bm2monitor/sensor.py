@@ -22,7 +22,8 @@ from homeassistant.const import (
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
     EntityCategory,
     UnitOfTime,
-    UnitOfElectricPotential
+    UnitOfElectricPotential,
+    UnitOfTemperature
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -31,6 +32,7 @@ from homeassistant.helpers.sensor import sensor_device_info_to_hass_device_info
 from . import BMxConfigEntry
 from .device import device_key_to_bluetooth_entity_key
 from .const import BATTERY_STATUS_ICON
+from .breaker import BREAKER_CLOSED, BREAKER_OPEN, BREAKER_RETRYING
 
 import logging
 _LOGGER = logging.getLogger(__name__)
@@ -56,6 +58,61 @@ SENSOR_DESCRIPTIONS: dict[str, SensorEntityDescription] = {
         state_class=SensorStateClass.MEASUREMENT,
         name="Percent"
     ),
+    BMxSensor.TEMPERATURE: SensorEntityDescription(
+        key=BMxSensor.TEMPERATURE,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        state_class=SensorStateClass.MEASUREMENT,
+        name="Temperature"
+    ),
+    BMxSensor.VOLTAGE_TREND_SHORT: SensorEntityDescription(
+        key=BMxSensor.VOLTAGE_TREND_SHORT,
+        native_unit_of_measurement="V/h",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision = 3,
+        name="Voltage trend (5 minutes)",
+        icon="mdi:chart-line"
+    ),
+    BMxSensor.VOLTAGE_TREND_LONG: SensorEntityDescription(
+        key=BMxSensor.VOLTAGE_TREND_LONG,
+        native_unit_of_measurement="V/h",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision = 3,
+        name="Voltage trend (1 hour)",
+        icon="mdi:chart-line"
+    ),
+    BMxSensor.TIME_TO_CRITICAL: SensorEntityDescription(
+        key=BMxSensor.TIME_TO_CRITICAL,
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        suggested_display_precision = 1,
+        name="Time to critical",
+        icon="mdi:battery-clock-outline"
+    ),
+    BMxSensor.CIRCUIT_BREAKER: SensorEntityDescription(
+        key=BMxSensor.CIRCUIT_BREAKER,
+        device_class=SensorDeviceClass.ENUM,
+        options=[BREAKER_CLOSED, BREAKER_OPEN, BREAKER_RETRYING],
+        entity_category=EntityCategory.DIAGNOSTIC,
+        name="Circuit breaker",
+        icon="mdi:electric-switch"
+    ),
+    **{
+        key: SensorEntityDescription(
+            key=key,
+            device_class=SensorDeviceClass.VOLTAGE,
+            native_unit_of_measurement=UnitOfElectricPotential.VOLT,
+            state_class=SensorStateClass.MEASUREMENT,
+            suggested_display_precision = 2,
+            name=name,
+            icon="mdi:current-dc"
+        )
+        for key, name in (
+            (BMxSensor.VOLTAGE_WINDOW_MIN, "Voltage (window minimum)"),
+            (BMxSensor.VOLTAGE_WINDOW_MAX, "Voltage (window maximum)"),
+            (BMxSensor.VOLTAGE_WINDOW_MEAN, "Voltage (window mean)"),
+        )
+    },
     BMxSensor.SIGNAL_STRENGTH: SensorEntityDescription(
         key=BMxSensor.SIGNAL_STRENGTH,
         device_class=SensorDeviceClass.SIGNAL_STRENGTH,
@@ -65,6 +122,39 @@ SENSOR_DESCRIPTIONS: dict[str, SensorEntityDescription] = {
         entity_registry_enabled_default=False,
         name="Signal strength"
     ),
+    **{
+        key: SensorEntityDescription(
+            key=key,
+            device_class=SensorDeviceClass.DURATION,
+            native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+            state_class=SensorStateClass.MEASUREMENT,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            entity_registry_enabled_default=False,
+            name=name
+        )
+        for key, name in (
+            (BMxSensor.POLL_DURATION, "Poll duration"),
+            (BMxSensor.POLL_DURATION_P50, "Poll duration (median)"),
+            (BMxSensor.POLL_DURATION_P95, "Poll duration (95th percentile)"),
+            (BMxSensor.CONNECT_TIME, "Connect time"),
+            (BMxSensor.GATT_WAIT_TIME, "Notification wait time"),
+        )
+    },
+    **{
+        key: SensorEntityDescription(
+            key=key,
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            entity_category=EntityCategory.DIAGNOSTIC,
+            entity_registry_enabled_default=False,
+            name=name,
+            icon=icon
+        )
+        for key, name, icon in (
+            (BMxSensor.POLL_SUCCESSES, "Successful polls", "mdi:check-circle-outline"),
+            (BMxSensor.POLL_TIMEOUTS, "Poll timeouts", "mdi:timer-alert-outline"),
+            (BMxSensor.POLL_ERRORS, "Poll errors", "mdi:alert-circle-outline"),
+        )
+    },
 }
 
 
@@ -134,6 +224,17 @@ class BMxBluetoothSensorEntity(
         """Return True if the device is no longer broadcasting."""
         return not self.processor.available
 
+    @property
+    def state_class(self) -> SensorStateClass | str | None:
+        """ When not every reading is recorded, the percentage's long-term statistics come from the hourly
+            statistics instead, so the recorder isn't left compiling its own from the heartbeat alone """
+        if (
+            self.entity_key.key == BMxSensor.BATTERY_PERCENT
+            and not self.processor.coordinator.device_data.records_every_reading
+        ):
+            return None
+        return super().state_class
+
     @property
     def icon(self) -> str:
 
@@ -142,3 +243,4 @@ class BMxBluetoothSensorEntity(
             return BATTERY_STATUS_ICON.get(self.processor.entity_data.get(self.entity_key), "mdi:battery-off")
         elif self.entity_key.key == "battery_voltage":
             return "mdi:current-dc"
+        return super().icon
@@ -0,0 +1,45 @@
+"""High-rate notification windows for the BM2 battery monitor integration."""
+
+from __future__ import annotations
+
+from .protocol import BMxFrame
+
+
+class FrameWindow:
+    """ Running minimum, maximum and mean voltage, and the last reading, of every notification received over a
+        window, in constant time and space per notification - so a window's worth of readings can be published
+        as a single update """
+
+    __slots__ = ("started", "count", "_total", "_minimum", "_maximum", "last")
+
+    def __init__(self, started: float, frame: BMxFrame) -> None:
+        self.started = started
+        self.count = 1
+        self._total = frame.centivolts
+        self._minimum = frame.centivolts
+        self._maximum = frame.centivolts
+        self.last = frame
+
+    def add(self, frame: BMxFrame) -> None:
+        """Add a reading to the window"""
+
+        centivolts = frame.centivolts
+        self.count += 1
+        self._total += centivolts
+        if centivolts < self._minimum:
+            self._minimum = centivolts
+        if centivolts > self._maximum:
+            self._maximum = centivolts
+        self.last = frame
+
+    @property
+    def minimum_voltage(self) -> float:
+        return self._minimum / 100.0
+
+    @property
+    def maximum_voltage(self) -> float:
+        return self._maximum / 100.0
+
+    @property
+    def mean_voltage(self) -> float:
+        return self._total / self.count / 100.0
@@ -0,0 +1,103 @@
+"""Micro-benchmark for handling repeated advertisements.
+
+Feeds a stream of advertisements from simulated monitors (see
+bm2_simulator.py) through BMxBluetoothDeviceData._start_update on its own,
+through the whole BluetoothData.update path Home Assistant calls for every
+advertisement, and through poll_needed, which the coordinator calls for
+every advertisement too (via the hub's needs_poll, which only adds a check
+that Home Assistant's running and a Bluetooth lookup).  It reports the
+median cost per advertisement of each in microseconds.  Each device has
+already seen one advertisement, so this is the steady-state cost.  With
+--debug the integration's debug logging is turned on (to a handler that
+discards everything), to show the cost of formatting log messages too.
+
+Run from the repository root, in an environment with the integration's
+requirements (and Home Assistant) installed:
+
+    python tools/bench_advertisements.py --devices 1 100 --advertisements 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.ha_bm2monitor.bmx_ble import BMxBluetoothDeviceData
+from custom_components.ha_bm2monitor.const import CONF_CONNECTION_MODE
+
+from bm2_simulator import SimulationSettings, make_fleet
+
+
+def _per_advertisement(handler, advertisements: list, repeat: int) -> float:
+    """Median microseconds per advertisement over repeat passes through advertisements"""
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        for device_data, service_info in advertisements:
+            handler(device_data, service_info)
+        timings.append((time.perf_counter_ns() - started) / len(advertisements) / 1000)
+    return statistics.median(timings)
+
+
+def _run(count: int, args: argparse.Namespace) -> dict[str, float]:
+    fleet = make_fleet(count, SimulationSettings())
+    devices = []
+    for simulated in fleet:
+        device_data = BMxBluetoothDeviceData()
+        device_data.set_entry_data({CONF_CONNECTION_MODE: args.connection_mode})
+        device_data.update(simulated.advertisement())
+        devices.append(device_data)
+
+    # Interleaved, like a busy radio, with the RSSI and percentage varying between advertisements
+    per_device = max(1, args.advertisements // count)
+    advertisements = [
+        (device_data, simulated.advertisement())
+        for _ in range(per_device)
+        for device_data, simulated in zip(devices, fleet)
+    ]
+
+    return {
+        "_start_update": _per_advertisement(
+            lambda device_data, service_info: device_data._start_update(service_info), advertisements, args.repeat
+        ),
+        "update": _per_advertisement(
+            lambda device_data, service_info: device_data.update(service_info), advertisements, args.repeat
+        ),
+        "poll_needed": _per_advertisement(
+            lambda device_data, service_info: device_data.poll_needed(service_info, args.last_poll), advertisements, args.repeat
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--devices", type = int, nargs = "+", default = [1, 100], help = "numbers of monitors advertising")
+    parser.add_argument("--advertisements", type = int, default = 100000, help = "advertisements per pass")
+    parser.add_argument("--repeat", type = int, default = 5, help = "passes to take the median of")
+    parser.add_argument(
+        "--connection-mode", default = "Connect for each update", help = "connection mode option, eg. 'Advertisements only (never connect)'"
+    )
+    parser.add_argument("--last-poll", type = float, default = 10, help = "seconds since the last poll, as passed to poll_needed")
+    parser.add_argument("--debug", action = "store_true", help = "turn on debug logging (to a null handler)")
+    args = parser.parse_args()
+
+    logger = logging.getLogger("custom_components.ha_bm2monitor")
+    logger.propagate = False
+    logger.addHandler(logging.NullHandler())
+    logger.setLevel(logging.DEBUG if args.debug else logging.INFO)
+
+    print(f"{'devices':>8}{'_start_update us':>20}{'update us':>12}{'poll_needed us':>18}")
+    for count in args.devices:
+        result = _run(count, args)
+        print(f"{count:>8}{result['_start_update']:>20.2f}{result['update']:>12.2f}{result['poll_needed']:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
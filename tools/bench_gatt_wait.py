@@ -0,0 +1,111 @@
+"""Benchmark the GATT notification handoff in BMxBluetoothDeviceData._get_payload.
+
+Compares the original 0.25 second sleep loop with the event-driven handoff,
+using a fake client that delivers a single encrypted BM2 frame after a
+configurable delay.  Latency is measured from the moment the notification
+lands to the moment the reading has been decoded.
+
+Run from the repository root, in an environment with the integration's
+requirements (and Home Assistant) installed:
+
+    python tools/bench_gatt_wait.py --polls 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.ha_bm2monitor.bmx_ble import BMxBluetoothDeviceData
+from custom_components.ha_bm2monitor.models import DEVICE_TYPES, Models
+from custom_components.ha_bm2monitor.const import GATT_TIMEOUT
+from custom_components.ha_bm2monitor.protocol import decode_bm2_frame, encode_bm2_frame
+
+
+class FakeClient:
+    """Just enough of a BleakClient to satisfy _get_payload."""
+
+    address = "AA:BB:CC:DD:EE:FF"
+    is_connected = True
+
+    def __init__(self, delay: float) -> None:
+        self._delay = delay
+        self._frame = encode_bm2_frame(1275, 2, 85)   # 12.75V, normal, 85%
+        self.notified_at: float | None = None
+
+    async def start_notify(self, characteristic, callback) -> None:
+        def _notify() -> None:
+            self.notified_at = time.perf_counter()
+            callback(characteristic, self._frame)
+
+        asyncio.get_running_loop().call_later(self._delay, _notify)
+
+    async def stop_notify(self, characteristic) -> None:
+        pass
+
+
+class LegacyFakeClient(FakeClient):
+    """Fake client for the original path, which polled an attribute for the data."""
+
+    async def start_notify(self, characteristic, callback) -> None:
+        await super().start_notify(characteristic, lambda sender, data: setattr(self, "data", data))
+
+
+async def _legacy_get_payload(device_data: BMxBluetoothDeviceData, client: LegacyFakeClient) -> None:
+    """The original sleep loop, kept here as the baseline."""
+    ticks = 0
+    client.data = None
+    await client.start_notify(device_data._model_info.characteristic, None)
+    while (client.data is None) and (ticks < GATT_TIMEOUT * 4):
+        await asyncio.sleep(0.25)
+        ticks += 1
+    await client.stop_notify(device_data._model_info.characteristic)
+    if client.data is not None:
+        device_data._handle_frame(client.address, decode_bm2_frame(client.data))
+
+
+async def _run(polls: int, max_delay: float) -> None:
+    device_data = BMxBluetoothDeviceData()
+    device_data.set_entry_data({})
+    device_data._model_info = DEVICE_TYPES[Models.BM2]
+
+    delays = [random.uniform(0, max_delay) for _ in range(polls)]
+    results: dict[str, list[float]] = {"sleep loop": [], "event-driven": []}
+
+    for delay in delays:
+        client = LegacyFakeClient(delay)
+        await _legacy_get_payload(device_data, client)
+        results["sleep loop"].append(time.perf_counter() - client.notified_at)
+
+        client = FakeClient(delay)
+        await device_data._get_payload(client)
+        results["event-driven"].append(time.perf_counter() - client.notified_at)
+
+    print(f"{'path':<14}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}")
+    for name, latencies in results.items():
+        latencies_ms = [latency * 1000 for latency in latencies]
+        print(
+            f"{name:<14}{statistics.fmean(latencies_ms):>10.2f}"
+            f"{statistics.median(latencies_ms):>10.2f}{max(latencies_ms):>10.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=20, help="number of polls per path")
+    parser.add_argument(
+        "--max-delay", type=float, default=1.0, help="maximum notification delay in seconds"
+    )
+    args = parser.parse_args()
+    asyncio.run(_run(args.polls, args.max_delay))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Measure how long the integration takes to import.
+
+Each entry point Home Assistant loads (the package itself, the config flow
+and the sensor platform) is imported in a fresh interpreter a few times.
+The script reports the median wall time, which of the heavy dependencies
+(numpy, pycryptodome, bleak) that import pulled in, and the self time of
+each of the integration's own modules from -X importtime.  With
+--budget-ms it exits non-zero if the package import is over budget, so it
+can be run as a check.
+
+Run from the repository root, in an environment with the integration's
+requirements (and Home Assistant) installed:
+
+    python tools/bench_import_time.py --repeat 5 --budget-ms 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "custom_components.ha_bm2monitor"
+
+TARGETS = [
+    PACKAGE,
+    f"{PACKAGE}.config_flow",
+    f"{PACKAGE}.sensor",
+]
+
+# Dependencies that should only be imported once they're actually needed
+HEAVY_MODULES = ["numpy", "Crypto", "bleak", "bleak_retry_connector"]
+
+
+def _measure(module: str) -> tuple[float, list[str], dict[str, int]]:
+    """Import module in a fresh interpreter, returning seconds taken, heavy modules loaded and our modules' self times (us)"""
+
+    code = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - started\n"
+        f"print(json.dumps([elapsed, [name for name in {HEAVY_MODULES!r} if name in sys.modules]]))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd = ROOT,
+        capture_output = True,
+        text = True,
+        check = True,
+    )
+    elapsed, heavy = json.loads(result.stdout.splitlines()[-1])
+
+    own: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        # import time:   self [us] |  cumulative | imported package
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        if name.startswith(PACKAGE):
+            own[name] = int(fields[0])
+
+    return elapsed, heavy, own
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--repeat", type = int, default = 5, help = "imports of each entry point")
+    parser.add_argument("--budget-ms", type = float, help = "fail if importing the package takes longer than this")
+    args = parser.parse_args()
+
+    package_ms = None
+    own_times: dict[str, int] = {}
+
+    print(f"{'entry point':<44}{'median ms':>10}{'min ms':>10}  heavy modules loaded")
+    for target in TARGETS:
+        timings = []
+        for _ in range(args.repeat):
+            elapsed, heavy, own = _measure(target)
+            timings.append(elapsed * 1000)
+            own_times.update(own)
+        median = statistics.median(timings)
+        if target == PACKAGE:
+            package_ms = median
+        print(f"{target:<44}{median:>10.1f}{min(timings):>10.1f}  {', '.join(heavy) or '-'}")
+
+    print()
+    print(f"{'module (self time)':<44}{'ms':>10}")
+    for name, self_us in sorted(own_times.items(), key = lambda item: item[1], reverse = True):
+        print(f"{name:<44}{self_us / 1000:>10.2f}")
+
+    if args.budget_ms is not None and package_ms is not None and package_ms > args.budget_ms:
+        print(f"\nImporting {PACKAGE} took {package_ms:.1f}ms, over the {args.budget_ms:.1f}ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
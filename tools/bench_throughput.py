@@ -0,0 +1,120 @@
+"""End-to-end throughput benchmark for the BM2 poll path.
+
+Drives async_poll -> _get_payload -> _finish_update ->
+sensor_update_to_bluetooth_data_update for a fleet of simulated monitors
+(see bm2_simulator.py), sharing connection slots through the integration's
+own scheduler, and reports polls per second, p50/p99 poll latency and peak
+memory for each fleet size.
+
+Run from the repository root, in an environment with the integration's
+requirements (and Home Assistant) installed:
+
+    python tools/bench_throughput.py --devices 1 10 100 500 --duration 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bleak.exc import BleakError
+
+from custom_components.ha_bm2monitor import bmx_ble
+from custom_components.ha_bm2monitor.bmx_ble import BMxBluetoothDeviceData
+from custom_components.ha_bm2monitor.const import CONF_BATTERY_TYPE
+from custom_components.ha_bm2monitor.scheduler import BMxConnectionScheduler
+from custom_components.ha_bm2monitor.sensor import sensor_update_to_bluetooth_data_update
+
+from bm2_simulator import SimulatedRadio, SimulationSettings, make_fleet
+
+
+async def _run_fleet(count: int, args: argparse.Namespace) -> dict[str, float]:
+    settings = SimulationSettings(
+        latency = args.latency,
+        jitter = args.jitter,
+        drop_rate = args.drop_rate,
+        connect_failure_rate = args.connect_failure_rate,
+    )
+    fleet = make_fleet(count, settings)
+    radio = SimulatedRadio(fleet)
+    bmx_ble.establish_connection = radio.establish_connection
+
+    scheduler = BMxConnectionScheduler(args.slots, 120)
+    latencies: list[float] = []
+    failures = 0
+
+    async def _poll_forever(index: int, simulated) -> None:
+        nonlocal failures
+        device_data = BMxBluetoothDeviceData()
+        device_data.set_entry_data({CONF_BATTERY_TYPE: args.battery_type})
+        device_data.update(simulated.advertisement())
+        source = f"adapter{index % args.adapters}"
+
+        while True:
+            started = time.perf_counter()
+            try:
+                async with scheduler.async_slot(source, device_data.urgent):
+                    update = await device_data.async_poll(simulated)
+                sensor_update_to_bluetooth_data_update(update)
+            except BleakError:
+                failures += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(_poll_forever(i, simulated)) for i, simulated in enumerate(fleet)]
+    await asyncio.sleep(args.duration)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if len(latencies) >= 2:
+        percentiles = statistics.quantiles(latencies, n=100)
+        p50, p99 = percentiles[49], percentiles[98]
+    else:
+        p50 = p99 = latencies[0] if latencies else float("nan")
+
+    return {
+        "polls/s": len(latencies) / elapsed,
+        "p50 ms": p50 * 1000,
+        "p99 ms": p99 * 1000,
+        "failures": failures,
+        "peak MiB": peak / 2**20,
+    }
+
+
+async def _run(args: argparse.Namespace) -> None:
+    columns = ("polls/s", "p50 ms", "p99 ms", "failures", "peak MiB")
+    print(f"{'devices':>8}" + "".join(f"{column:>12}" for column in columns))
+    for count in args.devices:
+        result = await _run_fleet(count, args)
+        print(f"{count:>8}" + "".join(f"{result[column]:>12.2f}" for column in columns))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[1, 10, 100, 500], help="fleet sizes to run")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to run each fleet size for")
+    parser.add_argument("--adapters", type=int, default=1, help="number of simulated adapters")
+    parser.add_argument("--slots", type=int, default=2, help="connections allowed in flight per adapter")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds to connect")
+    parser.add_argument("--jitter", type=float, default=0.2, help="random extra seconds per connection and notification")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="chance of a notification being lost")
+    parser.add_argument("--connect-failure-rate", type=float, default=0.0, help="chance of a connection attempt failing")
+    parser.add_argument("--battery-type", default="Lead-acid", help="battery chemistry option to decode with")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Simulated BM2 battery monitors, for benchmarking without real hardware.
+
+Provides stand-ins for the pieces of bleak and bleak-retry-connector that
+BMxBluetoothDeviceData uses.  Each simulated monitor emits correctly
+encrypted fff4 notifications about once a second while connected, with
+configurable connection latency, jitter and drop rates.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from bleak.exc import BleakError
+from home_assistant_bluetooth import BluetoothServiceInfo
+
+from custom_components.ha_bm2monitor.protocol import encode_bm2_frame
+
+BMX_MANUFACTURER = 0x004C
+
+# The BM2 advertises as an iBeacon, with the percentage in the last byte
+IBEACON_PREFIX = bytes.fromhex("0215655f83caae16a10a702e31f30d58dd82f6440000")
+
+
+@dataclass
+class SimulationSettings:
+    """Timing and reliability of the simulated monitors and radio"""
+
+    latency: float = 0.5               # Seconds to connect
+    jitter: float = 0.2                # Random extra seconds added to connections and notifications
+    notify_interval: float = 1.0       # Seconds between notifications while connected
+    drop_rate: float = 0.0             # Chance of any one notification being lost
+    connect_failure_rate: float = 0.0  # Chance of any one connection attempt failing
+
+
+@dataclass
+class SimulatedBM2:
+    """A simulated monitor, whose voltage wanders a little with every reading"""
+
+    address: str
+    settings: SimulationSettings
+    centivolts: int = 1270
+    status: int = 2
+    rng: random.Random = field(default_factory=random.Random)
+
+    @property
+    def name(self) -> str:
+        return "Battery Monitor"
+
+    @property
+    def percentage(self) -> int:
+        return max(0, min(100, (self.centivolts - 1150) * 100 // 130))
+
+    def next_frame(self) -> bytes:
+        self.centivolts = max(1050, min(1450, self.centivolts + self.rng.choice((-1, 0, 0, 1))))
+        return encode_bm2_frame(self.centivolts, self.status, self.percentage)
+
+    def advertisement(self, source: str = "hci0") -> BluetoothServiceInfo:
+        return BluetoothServiceInfo(
+            name = self.name,
+            address = self.address,
+            rssi = -60 - self.rng.randint(0, 30),
+            manufacturer_data = {BMX_MANUFACTURER: IBEACON_PREFIX + bytes([self.percentage])},
+            service_data = {},
+            service_uuids = [],
+            source = source,
+        )
+
+
+class SimulatedClient:
+    """Just enough of BleakClientWithServiceCache for BMxBluetoothDeviceData"""
+
+    def __init__(self, device: SimulatedBM2, disconnected_callback: Callable | None = None) -> None:
+        self._device = device
+        self._disconnected_callback = disconnected_callback
+        self._notify_task: asyncio.Task | None = None
+        self.is_connected = True
+
+    @property
+    def address(self) -> str:
+        return self._device.address
+
+    async def start_notify(self, characteristic, callback) -> None:
+        self._notify_task = asyncio.create_task(self._notify(characteristic, callback))
+
+    async def stop_notify(self, characteristic) -> None:
+        if self._notify_task is not None:
+            self._notify_task.cancel()
+            self._notify_task = None
+
+    async def disconnect(self) -> None:
+        await self.stop_notify(None)
+        if self.is_connected:
+            self.is_connected = False
+            if self._disconnected_callback is not None:
+                self._disconnected_callback(self)
+
+    async def _notify(self, characteristic, callback) -> None:
+        settings = self._device.settings
+        rng = self._device.rng
+        while True:
+            await asyncio.sleep(settings.notify_interval + rng.uniform(0, settings.jitter))
+            frame = self._device.next_frame()
+            if rng.random() >= settings.drop_rate:
+                callback(characteristic, frame)
+
+
+class SimulatedRadio:
+    """Stands in for establish_connection, connecting to whichever simulated monitor has the address"""
+
+    def __init__(self, devices: list[SimulatedBM2]) -> None:
+        self.devices = {device.address: device for device in devices}
+        self.connect_attempts = 0
+        self.connect_failures = 0
+
+    async def establish_connection(
+        self,
+        client_class,
+        device,
+        name: str,
+        disconnected_callback: Callable | None = None,
+        **kwargs,
+    ) -> SimulatedClient:
+        simulated = self.devices[device.address]
+        settings = simulated.settings
+        self.connect_attempts += 1
+        await asyncio.sleep(settings.latency + simulated.rng.uniform(0, settings.jitter))
+        if simulated.rng.random() < settings.connect_failure_rate:
+            self.connect_failures += 1
+            raise BleakError(f"Simulated connection failure to {device.address}")
+        return SimulatedClient(simulated, disconnected_callback)
+
+
+def make_fleet(count: int, settings: SimulationSettings, seed: int = 0) -> list[SimulatedBM2]:
+    """Build count simulated monitors with distinct addresses"""
+    return [
+        SimulatedBM2(
+            address = f"AA:BB:CC:{i >> 16 & 0xFF:02X}:{i >> 8 & 0xFF:02X}:{i & 0xFF:02X}",
+            settings = settings,
+            centivolts = 1200 + (i * 7) % 100,
+            rng = random.Random(seed + i),
+        )
+        for i in range(count)
+    ]
@@ -0,0 +1,96 @@
+"""Replay a BM2 frame capture through the integration's decoding code.
+
+Captures are written by the integration when "Capture raw Bluetooth data"
+is turned on in the options, to <config>/ha_bm2monitor/captures/<address>.bm2cap.
+Every captured GATT payload is decrypted and decoded exactly as it would be
+live, then run through the chosen battery chemistry's percentage and status
+tables, so a capture taken from a user's setup can be re-examined (or checked
+against a different chemistry) without the hardware.  With a chemistry
+chosen, the readings are also run through the batch lookup, which must
+give exactly the same results.
+
+Run from the repository root, in an environment with the integration's
+requirements installed:
+
+    python tools/replay_capture.py capture.bm2cap --battery-type LiFePO4 --csv out.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.ha_bm2monitor.battery import batch_state_of_charge, build_battery_profile
+from custom_components.ha_bm2monitor.capture import KIND_ADVERTISEMENT, iter_capture, replay_capture
+from custom_components.ha_bm2monitor.protocol import decode_bm2_frame, decode_bm6_frame
+from custom_components.ha_bm2monitor.const import (
+    BATTERY_STATUS_LIST,
+    BATTERY_TYPES,
+    CONF_BATTERY_TYPE,
+)
+
+DECODERS = {
+    "BM2": decode_bm2_frame,
+    "BM6": decode_bm6_frame,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("capture", help = "capture file to replay")
+    parser.add_argument("--model", choices = DECODERS, default = "BM2", help = "model the capture was taken from")
+    parser.add_argument("--battery-type", choices = BATTERY_TYPES, default = BATTERY_TYPES[0])
+    parser.add_argument("--csv", metavar = "PATH", help = "also write every replayed frame to a CSV file")
+    args = parser.parse_args()
+
+    profile = build_battery_profile({CONF_BATTERY_TYPE: args.battery_type})
+
+    started = time.perf_counter()
+    frames = list(replay_capture(args.capture, profile, DECODERS[args.model]))
+    elapsed = time.perf_counter() - started
+    advertisements = sum(1 for record in iter_capture(args.capture) if record.kind == KIND_ADVERTISEMENT)
+
+    if args.csv:
+        with open(args.csv, "w", newline = "") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["timestamp", "address", "voltage", "device_percentage", "device_status", "percentage", "status"])
+            for replayed in frames:
+                writer.writerow([
+                    f"{replayed.record.timestamp:.3f}",
+                    replayed.record.address,
+                    f"{replayed.frame.voltage:.2f}",
+                    replayed.frame.percentage,
+                    BATTERY_STATUS_LIST.get(replayed.frame.status, replayed.frame.status),
+                    replayed.percentage,
+                    BATTERY_STATUS_LIST.get(replayed.status, replayed.status),
+                ])
+
+    print(f"{len(frames)} GATT frames and {advertisements} advertisements in {args.capture}")
+    if frames:
+        voltages = [replayed.frame.voltage for replayed in frames]
+        print(f"voltage {min(voltages):.2f}V - {max(voltages):.2f}V, "
+              f"last {frames[-1].percentage}% ({BATTERY_STATUS_LIST.get(frames[-1].status, frames[-1].status)})")
+        print(f"replayed in {elapsed * 1000:.1f}ms ({len(frames) / elapsed:,.0f} frames/s)")
+
+    # Run the same readings back through the batch lookup, which has to agree with the live path exactly
+    if frames and profile is not None:
+        centivolts = [replayed.frame.centivolts for replayed in frames]
+        started = time.perf_counter()
+        percentages, statuses = batch_state_of_charge([profile], 0, centivolts)
+        elapsed = time.perf_counter() - started
+        mismatches = sum(
+            1 for replayed, percentage, status in zip(frames, percentages.tolist(), statuses.tolist())
+            if (replayed.percentage, replayed.status) != (percentage, status)
+        )
+        print(f"batch lookup in {elapsed * 1000:.2f}ms ({len(frames) / elapsed:,.0f} frames/s), {mismatches} mismatches")
+        if mismatches:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()